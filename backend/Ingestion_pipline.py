@@ -6,19 +6,40 @@ User can select repositories interactively
 
 import os
 import re
-import json
-import hashlib
-from typing import List, Dict, Optional
+import base64
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from pathlib import Path
+import httpx
+import orjson
+import xxhash
 from github import Github, Repository
 from dotenv import load_dotenv
 
+# Prefer RE2's linear-time matcher when google-re2 is installed; the
+# Terraform patterns below only use syntax both engines understand.
+try:
+    import re2 as regex_engine
+except ImportError:
+    regex_engine = re
+
 load_dotenv()
 
+# Compiled once at import and shared by every TerraformExtractor
+TERRAFORM_BLOCK_PATTERN = regex_engine.compile(
+    r'(?P<resource>resource\s+"(?P<resource_type>[^"]+)"\s+"(?P<resource_name>[^"]+)")'
+    # Quoted strings are consumed whole so braces inside them don't end the block
+    r'|(?P<module>module\s+"[^"]+"\s*\{(?:[^}"]|"[^"]*")*?source\s*=\s*"(?P<module_source>[^"]+)")'
+    r'|(?P<provider>provider\s+"(?P<provider_name>[^"]+)")'
+    r'|(?P<variable>variable\s+"(?P<variable_name>[^"]+)")'
+    r'|(?P<output>output\s+"(?P<output_name>[^"]+)")'
+)
+
 
-@dataclass
+@dataclass(slots=True)
 class TerraformFile:
     """Represents a Terraform file"""
     path: str
@@ -44,65 +65,89 @@ class TerraformExtractor:
     """Extracts and parses Terraform files from repositories"""
     
     TERRAFORM_EXTENSIONS = {'.tf', '.tfvars', '.hcl'}
-    
-    def __init__(self):
-        self.resource_pattern = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"')
-        self.module_pattern = re.compile(r'module\s+"([^"]+)"\s*\{[^}]*source\s*=\s*"([^"]+)"', re.DOTALL)
-        self.provider_pattern = re.compile(r'provider\s+"([^"]+)"')
-        self.variable_pattern = re.compile(r'variable\s+"([^"]+)"')
-        self.output_pattern = re.compile(r'output\s+"([^"]+)"')
+    TERRAFORM_SUFFIXES = tuple(TERRAFORM_EXTENSIONS)
+    BLOCK_PATTERN = TERRAFORM_BLOCK_PATTERN
+    TERRAFORM_CONFIG_PATTERN = re.compile(r'\s*terraform \{')
+    # Checked in order; the first filename keyword that matches wins
+    FILENAME_CLASSIFIERS = (
+        ('variables', 'variables'),
+        ('outputs', 'outputs'),
+        ('providers', 'providers'),
+        ('terraform', 'providers'),
+        ('modules', 'module'),
+        ('main', 'main'),
+    )
     
     def is_terraform_file(self, filepath: str) -> bool:
         """Check if file is a Terraform file"""
-        return Path(filepath).suffix in self.TERRAFORM_EXTENSIONS
+        return os.path.splitext(filepath)[1] in self.TERRAFORM_EXTENSIONS
     
     def classify_file_type(self, filepath: str, content: str) -> str:
         """Classify the type of Terraform file"""
-        filename = Path(filepath).name.lower()
+        filename = os.path.basename(filepath).lower()
         
-        if 'variables' in filename or filename.startswith('vars'):
+        if filename.startswith('vars'):
             return 'variables'
-        elif 'outputs' in filename:
-            return 'outputs'
-        elif 'providers' in filename or 'terraform' in filename:
-            return 'providers'
-        elif 'modules' in filename or '/modules/' in filepath:
-            return 'module'
-        elif 'main' in filename:
-            return 'main'
-        elif content.strip().startswith('terraform {'):
+        for keyword, file_type in self.FILENAME_CLASSIFIERS:
+            # Anything under a modules/ directory is a module, ahead of the 'main' keyword
+            if keyword in filename or (file_type == 'module' and '/modules/' in filepath):
+                return file_type
+        # Anchored match skips leading whitespace without copying the content
+        if self.TERRAFORM_CONFIG_PATTERN.match(content):
             return 'terraform_config'
-        else:
-            return 'resource'
+        return 'resource'
     
     def extract_resources(self, content: str) -> List[str]:
         """Extract resource types from Terraform code"""
-        matches = self.resource_pattern.findall(content)
-        return [f"{provider}.{name}" for provider, name in matches]
+        return self.scan_terraform_blocks(content)['resources']
     
     def extract_modules(self, content: str) -> List[str]:
         """Extract module sources from Terraform code"""
-        matches = self.module_pattern.findall(content)
-        return [source for _, source in matches]
+        return self.scan_terraform_blocks(content)['modules']
     
     def extract_providers(self, content: str) -> List[str]:
         """Extract providers from Terraform code"""
-        return list(set(self.provider_pattern.findall(content)))
+        return self.scan_terraform_blocks(content)['providers']
     
     def extract_variables(self, content: str) -> List[str]:
         """Extract variable names"""
-        return self.variable_pattern.findall(content)
+        return self.scan_terraform_blocks(content)['variables']
     
     def extract_outputs(self, content: str) -> List[str]:
         """Extract output names"""
-        return self.output_pattern.findall(content)
+        return self.scan_terraform_blocks(content)['outputs']
+    
+    def scan_terraform_blocks(self, content: str) -> Dict[str, List[str]]:
+        """Extract resources, modules, providers, variables and outputs in a single pass"""
+        blocks = {'resources': [], 'modules': [], 'providers': [], 'variables': [], 'outputs': []}
+        # Insertion-ordered dict dedupes providers as they are found
+        providers_seen = {}
+        
+        for match in self.BLOCK_PATTERN.finditer(content):
+            kind = match.lastgroup
+            if kind == 'resource':
+                blocks['resources'].append(f"{match.group('resource_type')}.{match.group('resource_name')}")
+            elif kind == 'module':
+                blocks['modules'].append(match.group('module_source'))
+            elif kind == 'provider':
+                providers_seen[match.group('provider_name')] = None
+            elif kind == 'variable':
+                blocks['variables'].append(match.group('variable_name'))
+            elif kind == 'output':
+                blocks['outputs'].append(match.group('output_name'))
+        
+        blocks['providers'] = list(providers_seen)
+        return blocks
     
     def parse_terraform_file(self, filepath: str, content: str, 
                             repo_name: str, repo_url: str, 
                             last_modified: str) -> TerraformFile:
         """Parse a Terraform file and extract metadata"""
-        file_hash = hashlib.sha256(content.encode()).hexdigest()
+        encoded = content.encode('utf-8')
+        # Non-cryptographic: the hash only identifies file contents for dedup
+        file_hash = xxhash.xxh3_64_hexdigest(encoded)
         file_type = self.classify_file_type(filepath, content)
+        blocks = self.scan_terraform_blocks(content)
         
         return TerraformFile(
             path=filepath,
@@ -111,12 +156,12 @@ class TerraformExtractor:
             repo_url=repo_url,
             file_hash=file_hash,
             file_type=file_type,
-            resources=self.extract_resources(content),
-            modules=self.extract_modules(content),
-            providers=self.extract_providers(content),
-            variables=self.extract_variables(content),
-            outputs=self.extract_outputs(content),
-            size_bytes=len(content.encode()),
+            resources=blocks['resources'],
+            modules=blocks['modules'],
+            providers=blocks['providers'],
+            variables=blocks['variables'],
+            outputs=blocks['outputs'],
+            size_bytes=len(encoded),
             last_modified=last_modified
         )
 
@@ -124,10 +169,16 @@ class TerraformExtractor:
 class GitHubConnector:
     """Connects to GitHub and fetches Terraform repositories"""
     
+    MAX_CONCURRENT_FETCHES = 10
+    MAX_CONCURRENT_PROBES = 16
+    MAX_FETCH_ATTEMPTS = 3
+    
     def __init__(self, github_token: str):
+        self.github_token = github_token
         self.github = Github(github_token)
         self.extractor = TerraformExtractor()
         self.user = self.github.get_user()
+        self._repo_cache: Dict[str, Repository] = {}
     
     def list_user_repositories(self, include_private: bool = True) -> List[Repository]:
         """List all repositories for the authenticated user"""
@@ -141,26 +192,30 @@ class GitHubConnector:
             print(f"ERROR: Error listing repositories: {e}")
             return []
     
+    def _probe_repo(self, repo: Repository) -> Tuple[Repository, bool]:
+        """Check a repository root for Terraform files"""
+        try:
+            contents = repo.get_contents("")
+            has_terraform = any(
+                self.extractor.is_terraform_file(item.name) 
+                for item in contents 
+                if item.type == "file"
+            )
+        except:
+            has_terraform = False
+        return repo, has_terraform
+    
     def filter_terraform_repositories(self, repos: List[Repository]) -> List[Repository]:
         """Filter repositories that likely contain Terraform code"""
         terraform_repos = []
         
         print("\nScanning repositories for Terraform code...")
-        for repo in repos:
-            try:
-                # Quick check: look for .tf files in root
-                contents = repo.get_contents("")
-                has_terraform = any(
-                    self.extractor.is_terraform_file(item.name) 
-                    for item in contents 
-                    if item.type == "file"
-                )
-                
+        # Quick check: look for .tf files in root, probing repositories concurrently
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_PROBES) as executor:
+            for repo, has_terraform in executor.map(self._probe_repo, repos):
                 if has_terraform:
                     terraform_repos.append(repo)
                     print(f"  Found Terraform in: {repo.full_name}")
-            except:
-                pass
         
         return terraform_repos
     
@@ -229,64 +284,164 @@ class GitHubConnector:
                 print("Invalid input. Please use format: 1,3,5 or 1-5 or 'all'")
     
     def fetch_repo(self, repo_name: str) -> Repository:
-        """Fetch a GitHub repository"""
+        """Fetch a GitHub repository, revalidating cached ones with a conditional request"""
         try:
-            return self.github.get_repo(repo_name)
+            repo = self._repo_cache.get(repo_name)
+            if repo is not None:
+                # Sends If-None-Match with the stored ETag; a 304 costs no rate-limit quota
+                repo.update()
+                return repo
+            
+            repo = self.github.get_repo(repo_name)
+            self._repo_cache[repo_name] = repo
+            return repo
         except Exception as e:
             print(f"ERROR: Error fetching repo {repo_name}: {e}")
             raise
     
-    def extract_terraform_files_from_repo(self, repo: Repository, 
-                                         skip_dirs: List[str] = None) -> List[TerraformFile]:
-        """Extract all Terraform files from a repository"""
+    async def _fetch_blob(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, 
+                          blob_url: str) -> Tuple[str, str]:
+        """Download a single blob, honouring GitHub's Retry-After on rate limits
+
+        Returns the decoded content and the response's Last-Modified header,
+        or an empty string when GitHub sends none.
+        """
+        async with semaphore:
+            for attempt in range(self.MAX_FETCH_ATTEMPTS):
+                response = await client.get(blob_url)
+                retry_after = response.headers.get('Retry-After')
+                
+                if (response.status_code in (403, 429) and retry_after 
+                        and attempt < self.MAX_FETCH_ATTEMPTS - 1):
+                    await asyncio.sleep(float(retry_after))
+                    continue
+                
+                response.raise_for_status()
+                break
+        
+        content = base64.b64decode(response.json()['content']).decode('utf-8')
+        return content, response.headers.get('Last-Modified', '')
+    
+    async def _walk_tree(self, repo: Repository, skip_pattern: re.Pattern) -> AsyncIterator[TerraformFile]:
+        """List the whole repository in one Git Trees call and fetch Terraform blobs concurrently"""
+        tree = await asyncio.to_thread(repo.get_git_tree, repo.default_branch, True)
+        
+        if tree.truncated:
+            # GitHub caps recursive listings; fall back to walking directory by directory
+            print(f"  WARNING: Tree listing truncated, walking contents instead")
+            for tf_file in await asyncio.to_thread(self._walk_contents, repo, skip_pattern):
+                yield tf_file
+            return
+        
+        # Filter on the listing alone so only Terraform blobs are ever downloaded
+        entries = [
+            entry for entry in tree.tree
+            if entry.path.endswith(self.extractor.TERRAFORM_SUFFIXES)
+            and entry.type == "blob"
+            and not skip_pattern.search(os.path.dirname(entry.path))
+        ]
+        
+        headers = {
+            'Authorization': f'Bearer {self.github_token}',
+            'Accept': 'application/vnd.github+json'
+        }
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        
+        async def fetch_entry(entry):
+            try:
+                return entry, await self._fetch_blob(client, semaphore, entry.url)
+            except Exception as e:
+                return entry, e
+        
+        async with httpx.AsyncClient(headers=headers, timeout=30) as client:
+            # Every blob downloads concurrently, but files are yielded in tree order so
+            # the output is the same from run to run
+            fetches = [asyncio.create_task(fetch_entry(entry)) for entry in entries]
+            try:
+                for fetch in fetches:
+                    entry, blob = await fetch
+                    if isinstance(blob, Exception):
+                        print(f"  ERROR processing {entry.path}: {blob}")
+                        continue
+                    content, last_modified = blob
+                    
+                    tf_file = self.extractor.parse_terraform_file(
+                        filepath=entry.path,
+                        content=content,
+                        repo_name=repo.full_name,
+                        repo_url=repo.html_url,
+                        last_modified=last_modified
+                    )
+                    print(f"  Extracted: {entry.path} ({tf_file.file_type})")
+                    yield tf_file
+            finally:
+                # A consumer that stops early must not leave downloads running
+                for fetch in fetches:
+                    fetch.cancel()
+    
+    def _walk_contents(self, repo: Repository, skip_pattern: re.Pattern) -> List[TerraformFile]:
+        """Walk the repository one directory at a time with the contents API"""
+        terraform_files = []
+        contents = deque(repo.get_contents(""))
+        
+        while contents:
+            file_content = contents.popleft()
+            
+            if file_content.type == "dir":
+                # Skip certain directories
+                if skip_pattern.search(file_content.path):
+                    continue
+                contents.extend(repo.get_contents(file_content.path))
+            
+            elif self.extractor.is_terraform_file(file_content.path):
+                try:
+                    content = file_content.decoded_content.decode('utf-8')
+                    tf_file = self.extractor.parse_terraform_file(
+                        filepath=file_content.path,
+                        content=content,
+                        repo_name=repo.full_name,
+                        repo_url=repo.html_url,
+                        last_modified=file_content.last_modified
+                    )
+                    terraform_files.append(tf_file)
+                    print(f"  Extracted: {file_content.path} ({tf_file.file_type})")
+                except Exception as e:
+                    print(f"  ERROR processing {file_content.path}: {e}")
+        
+        return terraform_files
+    
+    async def extract_terraform_files_from_repo(self, repo: Repository, 
+                                               skip_dirs: List[str] = None) -> AsyncIterator[TerraformFile]:
+        """Stream Terraform files from a repository as they are fetched and parsed"""
         if skip_dirs is None:
             skip_dirs = ['.git', 'test', 'example', 'examples', '.terraform', 'tests']
         
-        terraform_files = []
+        # One alternation checks every skip substring in a single scan of the path;
+        # (?!) never matches, so an empty skip list skips nothing
+        skip_pattern = re.compile('|'.join(map(re.escape, skip_dirs)) or '(?!)')
+        
+        found = 0
         
         try:
             print(f"\nProcessing repository: {repo.full_name}")
-            contents = repo.get_contents("")
-            
-            while contents:
-                file_content = contents.pop(0)
-                
-                if file_content.type == "dir":
-                    # Skip certain directories
-                    if any(skip in file_content.path for skip in skip_dirs):
-                        continue
-                    contents.extend(repo.get_contents(file_content.path))
-                
-                elif self.extractor.is_terraform_file(file_content.path):
-                    try:
-                        content = file_content.decoded_content.decode('utf-8')
-                        tf_file = self.extractor.parse_terraform_file(
-                            filepath=file_content.path,
-                            content=content,
-                            repo_name=repo.full_name,
-                            repo_url=repo.html_url,
-                            last_modified=file_content.last_modified
-                        )
-                        terraform_files.append(tf_file)
-                        print(f"  Extracted: {file_content.path} ({tf_file.file_type})")
-                    except Exception as e:
-                        print(f"  ERROR processing {file_content.path}: {e}")
-            
-            print(f"  Total Terraform files found: {len(terraform_files)}")
+            async for tf_file in self._walk_tree(repo, skip_pattern):
+                found += 1
+                yield tf_file
+            print(f"  Total Terraform files found: {found}")
             
         except Exception as e:
             print(f"ERROR: Error processing repository {repo.full_name}: {e}")
-        
-        return terraform_files
 
 
 class TerraformExtractionPipeline:
     """Main extraction pipeline"""
     
+    MAX_CONCURRENT_WRITES = 8
+    
     def __init__(self, github_token: str):
         self.github_connector = GitHubConnector(github_token)
     
-    def interactive_extraction(self) -> List[Dict]:
+    async def interactive_extraction(self) -> List[Dict]:
         """Interactive mode: let user select repositories"""
         print("\n" + "="*70)
         print("TERRAFORM EXTRACTION - INTERACTIVE MODE")
@@ -323,34 +478,43 @@ class TerraformExtractionPipeline:
             print("\nNo repositories selected. Exiting.")
             return []
         
-        # Extract from selected repositories
+        # Extract from selected repositories concurrently
+        outcomes = await asyncio.gather(
+            *[self.extract_from_repository(repo) for repo in selected_repos],
+            return_exceptions=True
+        )
+        
         results = []
-        for repo in selected_repos:
-            try:
-                result = self.extract_from_repository(repo)
-                results.append(result)
-            except Exception as e:
-                print(f"ERROR: Error extracting from {repo.full_name}: {e}")
+        for repo, outcome in zip(selected_repos, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"ERROR: Error extracting from {repo.full_name}: {outcome}")
                 results.append({
                     'status': 'error',
                     'repo_name': repo.full_name,
-                    'error': str(e),
+                    'error': str(outcome),
                     'files': [],
                     'count': 0
                 })
+            else:
+                results.append(outcome)
         
         return results
     
-    def extract_from_repository(self, repo: Repository) -> Dict:
+    async def extract_from_repository(self, repo: Repository) -> Dict:
         """Extract Terraform files from a single repository"""
         print(f"\n{'='*70}")
         print(f"EXTRACTING FROM REPOSITORY: {repo.full_name}")
         print(f"{'='*70}")
         
-        # Extract Terraform files
-        tf_files = self.github_connector.extract_terraform_files_from_repo(repo)
+        # Files are converted as they stream in, so no second list of TerraformFile
+        # objects is built. Every file's content is still held here, because the
+        # summary and the save prompt come after extraction.
+        files = [
+            tf_file.to_dict()
+            async for tf_file in self.github_connector.extract_terraform_files_from_repo(repo)
+        ]
         
-        if not tf_files:
+        if not files:
             print(f"WARNING: No Terraform files found in {repo.full_name}")
             return {
                 'status': 'no_files', 
@@ -366,42 +530,50 @@ class TerraformExtractionPipeline:
         return {
             'status': 'success',
             'repo_name': repo.full_name,
-            'files': [tf_file.to_dict() for tf_file in tf_files],
-            'count': len(tf_files),
+            'files': files,
+            'count': len(files),
             'timestamp': datetime.now().isoformat()
         }
     
     def save_to_json(self, results: List[Dict], output_file: str = "terraform_extracted.json"):
-        """Save extraction results to JSON file"""
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        """Save extraction results to JSON file, serializing one repository at a time"""
+        with open(output_file, 'wb') as f:
+            f.write(b'[\n')
+            for idx, result in enumerate(results):
+                if idx:
+                    f.write(b',\n')
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+            f.write(b'\n]\n')
         print(f"\nResults saved to: {output_file}")
     
+    def _write_file_with_metadata(self, full_path: str, tf_file: Dict):
+        """Write one Terraform file and its metadata sidecar"""
+        with open(full_path, 'w') as f:
+            f.write(tf_file['content'])
+        
+        metadata = {k: v for k, v in tf_file.items() if k != 'content'}
+        metadata_path = full_path + '.metadata.json'
+        with open(metadata_path, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+    
     def save_to_separate_files(self, results: List[Dict], output_dir: str = "extracted_terraform"):
         """Save each Terraform file separately"""
-        os.makedirs(output_dir, exist_ok=True)
-        
+        writes = []
         for result in results:
             if result['status'] == 'success':
                 repo_name = result['repo_name'].replace('/', '_')
                 repo_dir = os.path.join(output_dir, repo_name)
-                os.makedirs(repo_dir, exist_ok=True)
-                
                 for tf_file in result['files']:
-                    # Create subdirectories as needed
-                    file_path = tf_file['path']
-                    full_path = os.path.join(repo_dir, file_path)
-                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    
-                    # Save the file
-                    with open(full_path, 'w') as f:
-                        f.write(tf_file['content'])
-                    
-                    # Save metadata
-                    metadata = {k: v for k, v in tf_file.items() if k != 'content'}
-                    metadata_path = full_path + '.metadata.json'
-                    with open(metadata_path, 'w') as f:
-                        json.dump(metadata, f, indent=2)
+                    writes.append((os.path.join(repo_dir, tf_file['path']), tf_file))
+        
+        # Create each directory once, then write the files in parallel
+        os.makedirs(output_dir, exist_ok=True)
+        for directory in {os.path.dirname(full_path) for full_path, _ in writes}:
+            os.makedirs(directory, exist_ok=True)
+        
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_WRITES) as executor:
+            # list() surfaces any write error instead of dropping it
+            list(executor.map(lambda write: self._write_file_with_metadata(*write), writes))
         
         print(f"\nFiles saved to directory: {output_dir}")
 
@@ -425,7 +597,7 @@ def main():
     pipeline = TerraformExtractionPipeline(github_token=GITHUB_TOKEN)
     
     # Run interactive extraction
-    results = pipeline.interactive_extraction()
+    results = asyncio.run(pipeline.interactive_extraction())
     
     if not results:
         return
@@ -1,12 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from pydantic_core import to_json
+from typing import Callable, Dict, List, Optional
 from contextlib import asynccontextmanager
 import os
 import re
-import requests
+import sys
+import time
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import asyncio
 import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import httpx
 from dotenv import load_dotenv
 
 # Import your RAG system classes
@@ -24,30 +34,129 @@ from google import genai
 
 # Import sandbox tester
 from sandbox_testing import TerraformSandboxTester
+from response_cache import ResponseCache, collapse_whitespace, make_scope
+from terraform_parser import parse_file
 
 load_dotenv()
 
+# Handlers only enqueue records; a background listener thread does the stream I/O,
+# so request handlers never block on stdout
+logger = logging.getLogger("autoterra")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(log_queue))
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = QueueListener(log_queue, log_handler)
+
+# Browser origins allowed to call the API, comma-separated; defaults to the Vite dev server
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:8080,http://127.0.0.1:8080").split(",")
+    if origin.strip()
+]
+
+# Gemini connection pool; the agents run in worker threads and share one client
+GEMINI_MAX_CONNECTIONS = 64
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = 32
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# GitHub fetch limits shared by every extraction request
+GITHUB_MAX_CONNECTIONS = 64
+GITHUB_MAX_KEEPALIVE_CONNECTIONS = 20
+GITHUB_MAX_CONCURRENT_REQUESTS = 20
+GITHUB_CONNECT_RETRIES = 3
+# Rate-limited and 5xx responses are retried with exponential backoff, never waiting
+# longer than GITHUB_MAX_BACKOFF seconds at a time
+GITHUB_MAX_RETRIES = 3
+GITHUB_MAX_BACKOFF = 30
+GITHUB_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Below this many remaining API calls, requests are paced across the rest of the window
+GITHUB_RATE_LIMIT_LOW = 50
+# HCL parse processes per uvicorn worker; every worker has its own pool, so this stays small
+PARSE_WORKERS = 2
+# Path parts of /api/extract-github/file, checked before they go into a GitHub URL
+GITHUB_NAME_PATTERN = re.compile(r'[A-Za-z0-9_.-]+')
+GIT_SHA_PATTERN = re.compile(r'[0-9a-f]{40}(?:[0-9a-f]{24})?')
+
+# Parsed files keyed by (repo, path) -> TerraformFileRef, and whole
+# repositories keyed by name -> (tree ETag, tree sha, files). Git SHAs are content
+# hashes, so a matching SHA means the cached entry is still exact; the ETag lets
+# GitHub answer an unchanged tree with a bodiless 304 that costs no rate limit.
+# Every lookup follows a tree request made with the caller's own token.
+BLOB_CACHE_MAX_ENTRIES = 5000
+blob_cache: Dict[tuple, "TerraformFileRef"] = {}
+repo_tree_cache: Dict[str, tuple] = {}
+
+# Responses for repeated queries, see response_cache.py. Set RESPONSE_CACHE_DB to a
+# SQLite file to keep them across restarts and share them between workers on start-up
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB")
+# Extracted values are copied from the query verbatim, so analysis is keyed on its exact
+# spelling; "analyze-exact" leaves behind rows stored under the old case-folded keys
+analyze_cache = ResponseCache(
+    maxsize=512, ttl=3600, db_path=RESPONSE_CACHE_DB, name="analyze-exact", normalizer=collapse_whitespace
+)
+generate_cache = ResponseCache(
+    maxsize=512, ttl=3600, similarity_threshold=0.95, db_path=RESPONSE_CACHE_DB, name="generate"
+)
+
 # Global instances
 rag_system = None
 sandbox_tester = None
 terraform_available = False
 
+def gemini_http_options() -> genai.types.HttpOptions:
+    """HTTP/2 keep-alive pools for the Gemini client, so calls reuse TLS connections"""
+    pool = {
+        'http2': True,
+        'limits': httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS
+        ),
+    }
+    # The agents call the sync client; streaming endpoints may use the async one
+    return genai.types.HttpOptions(client_args=pool, async_client_args=dict(pool))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     global rag_system, sandbox_tester, terraform_available
     
     # Startup
-    print("Initializing Terraform IaC RAG System...")
+    log_listener.start()
+    logger.info("Initializing Terraform IaC RAG System...")
+    
+    # HCL parsing is CPU-bound; a process pool keeps it off the event loop. Its workers
+    # come from a forkserver that only imports terraform_parser, never a fork of this
+    # process with its logging, executor and ONNX Runtime threads
+    parse_context = multiprocessing.get_context("forkserver")
+    parse_context.set_forkserver_preload(["terraform_parser"])
+    app.state.parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=parse_context)
+    
+    # One pooled GitHub client for the whole process so TLS connections outlive a single request;
+    # the transport retries failed connection attempts, auth is passed per request
+    app.state.github_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=GITHUB_CONNECT_RETRIES,
+            limits=httpx.Limits(
+                max_connections=GITHUB_MAX_CONNECTIONS,
+                max_keepalive_connections=GITHUB_MAX_KEEPALIVE_CONNECTIONS
+            )
+        ),
+        timeout=10
+    )
     
     # Check if Terraform is installed
     terraform_available = shutil.which('terraform') is not None
     if terraform_available:
-        print("✓ Terraform found in PATH")
+        logger.info("✓ Terraform found in PATH")
     else:
-        print("⚠ WARNING: Terraform not found in PATH")
-        print("  Sandbox testing will be disabled")
-        print("  Install from: https://www.terraform.io/downloads")
+        logger.warning("Terraform not found in PATH")
+        logger.warning("Sandbox testing will be disabled")
+        logger.warning("Install from: https://www.terraform.io/downloads")
     
     # Get environment variables
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
@@ -61,52 +170,68 @@ async def lifespan(app: FastAPI):
         raise Exception("GEMINI_API_KEY must be set")
     
     try:
-        # Initialize Gemini client
-        gemini_client = genai.Client(api_key=api_key)
+        # The Gemini client and the Pinecone index (plus its embedding model) don't depend
+        # on each other, so they are built side by side in worker threads
+        gemini_client, vector_store = await asyncio.gather(
+            asyncio.to_thread(genai.Client, api_key=api_key, http_options=gemini_http_options()),
+            asyncio.to_thread(
+                PineconeIndex,
+                PINECONE_API_KEY,
+                PINECONE_ENVIRONMENT,
+                index_name="terraform-aws-docs"
+            )
+        )
         
-        # Initialize Pinecone vector store
-        vector_store = PineconeIndex(
-            PINECONE_API_KEY,
-            PINECONE_ENVIRONMENT,
-            index_name="terraform-aws-docs"
+        # Pay the TLS handshakes and first-encode cost now rather than on the first request
+        warm_ups = await asyncio.gather(
+            asyncio.to_thread(vector_store.warm_up),
+            asyncio.to_thread(gemini_client.models.get, model=GEMINI_MODEL),
+            return_exceptions=True
         )
+        for name, outcome in zip(("Pinecone", "Gemini"), warm_ups):
+            if isinstance(outcome, Exception):
+                logger.warning("%s warm-up failed: %s", name, outcome)
         
         # Initialize RAG system
         rag_system = RAGSystem(
             pinecone_index=vector_store,
             gemini_client=gemini_client,
-            model_name="gemini-2.5-flash"
+            model_name=GEMINI_MODEL
         )
         
         # Initialize sandbox tester only if Terraform is available
         if terraform_available:
             try:
                 sandbox_tester = TerraformSandboxTester()
-                print("✓ Sandbox Tester initialized successfully")
+                logger.info("✓ Sandbox Tester initialized successfully")
             except Exception as e:
-                print(f"⚠ WARNING: Sandbox tester initialization failed: {e}")
+                logger.warning("Sandbox tester initialization failed: %s", e)
                 sandbox_tester = None
         else:
-            print("⚠ Sandbox Tester disabled (Terraform not found)")
+            logger.warning("Sandbox Tester disabled (Terraform not found)")
         
-        print("✓ RAG System initialized successfully")
+        logger.info("✓ RAG System initialized successfully")
         
     except Exception as e:
-        print(f"ERROR: Error initializing systems: {e}")
+        logger.error("Error initializing systems: %s", e)
         raise
     
     yield
     
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    await app.state.github_client.aclose()
+    app.state.parse_pool.shutdown(cancel_futures=True)
+    log_listener.stop()
 
 app = FastAPI(title="Terraform IaC Generator API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=600,
 )
 
 # Pydantic models
@@ -126,6 +251,9 @@ class AnalyzeResponse(BaseModel):
     message: str
 
 class ValidationResultModel(BaseModel):
+    # Validated straight from the sandbox_testing dataclasses
+    model_config = ConfigDict(from_attributes=True)
+
     valid: bool
     format_valid: bool
     init_success: bool
@@ -134,6 +262,8 @@ class ValidationResultModel(BaseModel):
     warnings: List[str]
 
 class SecurityScanResultModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     passed: bool
     critical_issues: int
     high_issues: int
@@ -143,6 +273,8 @@ class SecurityScanResultModel(BaseModel):
     scanner: str
 
 class SandboxTestResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     status: str
     timestamp: str
     validation: Optional[ValidationResultModel]
@@ -175,9 +307,10 @@ class GitHubExtractionRequest(BaseModel):
     github_token: str
     repositories: List[GitHubRepository]
 
-class TerraformFileData(BaseModel):
+class TerraformFileRef(BaseModel):
+    """Extracted file metadata; the body is served by /api/extract-github/file/{repo_name}/{sha}"""
     path: str
-    content: str
+    sha: str
     repo_name: str
     file_type: str
     resources: List[str]
@@ -191,7 +324,7 @@ class GitHubExtractionResponse(BaseModel):
     status: str
     repositories_processed: int
     total_files: int
-    files: List[TerraformFileData]
+    files: List[TerraformFileRef]
     message: str
 
 # Sandbox testing models
@@ -201,6 +334,8 @@ class SandboxTestRequest(BaseModel):
     generate_plan: bool = True
 
 class SandboxTestResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     status: str
     timestamp: str
     validation: Optional[ValidationResultModel]
@@ -220,26 +355,6 @@ async def root():
         "terraform_available": terraform_available
     }
 
-@app.options("/api/analyze-query")
-async def options_analyze_query():
-    """Handle CORS preflight for analyze-query"""
-    return {"status": "ok"}
-
-@app.options("/api/generate")
-async def options_generate():
-    """Handle CORS preflight for generate"""
-    return {"status": "ok"}
-
-@app.options("/api/extract-github")
-async def options_extract_github():
-    """Handle CORS preflight for extract-github"""
-    return {"status": "ok"}
-
-@app.options("/api/test-sandbox")
-async def options_test_sandbox():
-    """Handle CORS preflight for test-sandbox"""
-    return {"status": "ok"}
-
 @app.post("/api/analyze-query", response_model=AnalyzeResponse)
 async def analyze_query(request: QueryRequest):
     """Analyze user query and extract requirements"""
@@ -250,9 +365,17 @@ async def analyze_query(request: QueryRequest):
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
     try:
-        print(f"\nAnalyzing query: {request.query}")
+        logger.info("Analyzing query: %s", request.query)
         
-        requirements = rag_system.query_understanding_agent(request.query)
+        # Exact tier only: the requirements echo literal values from the query,
+        # so a merely similar query must not reuse them
+        requirements = analyze_cache.get(request.query, rag_system.model_name)
+        if requirements is None:
+            # The Gemini round trip and the cache write stay off the event loop
+            requirements = await asyncio.to_thread(rag_system.query_understanding_agent, request.query)
+            await asyncio.to_thread(analyze_cache.put, request.query, requirements, rag_system.model_name)
+        else:
+            logger.info("Reusing cached analysis")
         
         return AnalyzeResponse(
             requirements=requirements,
@@ -260,7 +383,7 @@ async def analyze_query(request: QueryRequest):
         )
         
     except Exception as e:
-        print(f"ERROR: Error analyzing query: {e}")
+        logger.error("Error analyzing query: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/generate", response_model=GenerateResponse)
@@ -270,196 +393,268 @@ async def generate_terraform(request: GenerateRequest):
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        print(f"\n{'='*70}")
-        print(f"TERRAFORM CODE GENERATION STARTED")
-        print(f"{'='*70}")
-        print(f"Variables: {request.variables}")
+        return await run_generation_pipeline(request)
         
-        # AI-powered input validation
-        print("\n[1/6] Validating inputs with AI...")
-        correction_result = rag_system.validator.validate_and_correct(
-            request.variables,
-            request.requirements.get('resource_type', 'infrastructure')
+    except Exception as e:
+        logger.exception("Error generating code: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/generate/stream")
+async def generate_terraform_stream(request: GenerateRequest):
+    """Stream stage progress and generated code chunks as Server-Sent Events, then the full result"""
+    if not rag_system:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_token(text: str):
+        # Called from the generation worker thread
+        loop.call_soon_threadsafe(events.put_nowait, ("token", {"text": text}))
+    
+    def on_stage(data: dict):
+        # Called on the event loop between stages
+        events.put_nowait(("stage", data))
+    
+    def sse(event: str, data) -> bytes:
+        # pydantic-core encodes nested models straight to JSON bytes, no model_dump() dict first
+        return b"event: " + event.encode() + b"\ndata: " + to_json(data) + b"\n\n"
+    
+    async def event_stream():
+        task = asyncio.create_task(
+            run_generation_pipeline(request, on_token=on_token, on_stage=on_stage)
         )
+        # None marks the end; it is queued after every event already sent
+        task.add_done_callback(lambda _: events.put_nowait(None))
         
-        validated_variables = correction_result.corrected_variables
-        print(f"      Variables after validation: {validated_variables}")
-        
-        # Multi-Strategy Retrieval
-        print("\n[2/6] Retrieving relevant documentation...")
-        retrieval_results = rag_system.retrieval.multi_strategy_retrieve(
-            request.query,
-            request.requirements['resource_type']
-        )
-        print(f"      Retrieved {len(retrieval_results)} relevant chunks")
+        while (item := await events.get()) is not None:
+            yield sse(*item)
         
-        # Re-ranking & Validation
-        print("\n[3/6] Re-ranking and validating context...")
-        best_context = rag_system.reranker.rerank_and_validate(
-            request.query,
-            retrieval_results
-        )
-        print(f"      Selected best {len(best_context)} context chunks")
+        try:
+            response = task.result()
+        except Exception as e:
+            logger.error("Error generating code: %s", e)
+            yield sse("error", {"detail": str(e)})
+            return
         
-        # Multi-Agent Generation
-        print("\n[4/6] Generating code with multi-agent system...")
-        terraform_code, validation_results, variable_tracker = rag_system.agents.generate_with_agents(
+        yield sse("result", dict(response))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def run_generation_pipeline(
+    request: GenerateRequest,
+    on_token: Optional[Callable[[str], None]] = None,
+    on_stage: Optional[Callable[[dict], None]] = None
+) -> GenerateResponse:
+    """Run the generation stages; on_token receives generator text chunks as they stream
+    and on_stage a small progress dict after each stage"""
+    def report(step: int, **data):
+        if on_stage:
+            on_stage({"step": step, **data})
+    
+    logger.info("TERRAFORM CODE GENERATION STARTED")
+    logger.info("Variables: %s", request.variables)
+    
+    # Semantic hits are scoped to identical requirements, variables and options,
+    # so only the wording of the query may differ
+    cache_scope = make_scope(
+        rag_system.model_name,
+        request.requirements,
+        request.variables,
+        request.run_sandbox_test,
+        request.run_security_scan,
+        request.generate_plan,
+        terraform_available
+    )
+    # Embedded once and shared by the cache lookup and semantic retrieval
+    query_embedding = await asyncio.to_thread(rag_system.embed, request.query)
+    cached_response = generate_cache.get(request.query, cache_scope, query_embedding)
+    if cached_response is not None:
+        logger.info("Returning cached generation")
+        return cached_response
+    
+    # AI-powered input validation and multi-strategy retrieval don't depend on
+    # each other, so they run side by side in worker threads
+    logger.info("[1/6] Validating inputs with AI...")
+    logger.info("[2/6] Retrieving relevant documentation...")
+    correction_result, retrieval_results = await asyncio.gather(
+        asyncio.to_thread(
+            rag_system.validator.validate_and_correct,
+            request.variables,
+            request.requirements.get('resource_type', 'infrastructure')
+        ),
+        asyncio.to_thread(
+            rag_system.retrieval.multi_strategy_retrieve,
             request.query,
-            best_context,
-            validated_variables
-        )
-        print(f"      Initial code generated ({len(terraform_code)} chars)")
-        
-        # Reflection & QA
-        print("\n[5/6] Applying reflection and quality assurance...")
-        final_code = rag_system.reflection.reflection_qa_pipeline(
-            terraform_code,
-            validation_results,
-            best_context,
-            validated_variables,
-            variable_tracker,
-            max_iterations=4
+            request.requirements['resource_type'],
+            query_embedding=query_embedding
         )
-        print(f"      Final code refined ({len(final_code)} chars)")
-        
-        # Final verification
-        final_tracker = VariableTracker()
-        final_tracker.add_variables(validated_variables)
-        used_vars, unused_vars = final_tracker.check_usage_in_code(final_code)
-        
-        # Prepare validation summary
-        validation_summary = {
-            agent: {
-                'is_valid': val.is_valid,
-                'score': val.score,
-                'issues_count': len(val.issues)
-            }
-            for agent, val in validation_results.items()
+    )
+    
+    validated_variables = correction_result.corrected_variables
+    logger.info("Variables after validation: %s", validated_variables)
+    logger.info("Retrieved %s relevant chunks", len(retrieval_results))
+    report(1, stage="validation", variables=validated_variables)
+    report(2, stage="retrieval", retrieved=len(retrieval_results))
+    
+    # Re-ranking & Validation
+    logger.info("[3/6] Re-ranking and validating context...")
+    # The remaining stages depend on each other, but each still runs off the event loop
+    # so concurrent requests keep being served while Gemini and Terraform work
+    best_context = await asyncio.to_thread(
+        rag_system.reranker.rerank_and_validate,
+        request.query,
+        retrieval_results
+    )
+    logger.info("Selected best %s context chunks", len(best_context))
+    report(3, stage="rerank", selected=len(best_context))
+    
+    # Multi-Agent Generation
+    logger.info("[4/6] Generating code with multi-agent system...")
+    # Runs in a worker thread so streamed tokens reach the client while generation continues
+    terraform_code, validation_results, variable_tracker = await asyncio.to_thread(
+        rag_system.agents.generate_with_agents,
+        request.query,
+        best_context,
+        validated_variables,
+        on_token=on_token
+    )
+    logger.info("Initial code generated (%s chars)", len(terraform_code))
+    report(4, stage="generation", code=terraform_code)
+    
+    # Reflection & QA
+    logger.info("[5/6] Applying reflection and quality assurance...")
+    final_code = await asyncio.to_thread(
+        rag_system.reflection.reflection_qa_pipeline,
+        terraform_code,
+        validation_results,
+        best_context,
+        validated_variables,
+        variable_tracker,
+        max_iterations=4
+    )
+    logger.info("Final code refined (%s chars)", len(final_code))
+    report(5, stage="reflection", code=final_code)
+    
+    # Final verification; reflection left the tracker on exactly these variables and this code
+    used_vars, unused_vars = variable_tracker.check_usage_in_code(final_code)
+    
+    # Prepare validation summary
+    validation_summary = {
+        agent: {
+            'is_valid': val.is_valid,
+            'score': val.score,
+            'issues_count': len(val.issues)
         }
+        for agent, val in validation_results.items()
+    }
+    
+    logger.info("Generation complete!")
+    logger.info("Variables used: %s/%s", len(used_vars), len(validated_variables))
+    
+    # Run sandbox testing if enabled and available
+    sandbox_result = None
+    if request.run_sandbox_test and terraform_available and sandbox_tester:
+        logger.info("[6/6] Running sandbox testing...")
         
-        print(f"\n      Generation complete!")
-        print(f"      Variables used: {len(used_vars)}/{len(validated_variables)}")
-        
-        # Run sandbox testing if enabled and available
-        sandbox_result = None
-        if request.run_sandbox_test and terraform_available and sandbox_tester:
-            print(f"\n[6/6] Running sandbox testing...")
-            print(f"{'='*70}")
+        try:
+            # terraform and the scanners run as asyncio subprocesses, so the event loop
+            # supervises every concurrent sandbox run without a thread or process each
+            test_result = await sandbox_tester.test_terraform_code(
+                terraform_code=final_code,
+                run_security_scan=request.run_security_scan,
+                generate_plan=request.generate_plan
+            )
             
-            try:
-                test_result = sandbox_tester.test_terraform_code(
-                    terraform_code=final_code,
-                    run_security_scan=request.run_security_scan,
-                    generate_plan=request.generate_plan
-                )
-                
-                # Convert to response model
-                sandbox_result = SandboxTestResult(
-                    status=test_result.status,
-                    timestamp=test_result.timestamp,
-                    validation=ValidationResultModel(**test_result.validation.__dict__) if test_result.validation else None,
-                    security_scans=[SecurityScanResultModel(**scan.__dict__) for scan in test_result.security_scans],
-                    plan_output=test_result.plan_output,
-                    overall_passed=test_result.overall_passed,
-                    summary=test_result.summary
-                )
-                
-                print(f"\n      Sandbox testing complete!")
-                print(f"      Status: {test_result.status}")
-                print(f"      Overall passed: {test_result.overall_passed}")
-                
-                if not test_result.overall_passed:
-                    print(f"      WARNING: Sandbox tests failed!")
-                    if test_result.validation and test_result.validation.errors:
-                        print(f"      Validation errors: {len(test_result.validation.errors)}")
-                    for scan in test_result.security_scans:
-                        if not scan.passed:
-                            print(f"      Security issues: {scan.critical_issues} critical, {scan.high_issues} high")
-                
-            except Exception as e:
-                print(f"      WARNING: Sandbox testing failed: {e}")
-                import traceback
-                traceback.print_exc()
-        elif request.run_sandbox_test and not terraform_available:
-            print(f"\n[6/6] Sandbox testing skipped (Terraform not installed)")
-            print(f"      Install Terraform from: https://www.terraform.io/downloads")
-        else:
-            print(f"\n[6/6] Sandbox testing skipped (disabled)")
-        
-        print(f"\n{'='*70}")
-        print(f"GENERATION PIPELINE COMPLETE")
-        print(f"{'='*70}\n")
-        
-        message = "Terraform code generated successfully"
-        if sandbox_result:
-            message += " and tested in sandbox"
-        elif request.run_sandbox_test and not terraform_available:
-            message += " (sandbox testing unavailable - Terraform not installed)"
-        
-        return GenerateResponse(
-            terraform_code=final_code,
-            validation_summary=validation_summary,
-            requirements=request.requirements,
-            variables=validated_variables,
-            used_variables=used_vars,
-            unused_variables=unused_vars,
-            sandbox_test_result=sandbox_result,
-            sandbox_test_available=terraform_available,
-            message=message
-        )
-        
-    except Exception as e:
-        print(f"ERROR: Error generating code: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+            # Convert to response model
+            sandbox_result = SandboxTestResult.model_validate(test_result)
+            
+            logger.info("Sandbox testing complete!")
+            logger.info("Status: %s", test_result.status)
+            logger.info("Overall passed: %s", test_result.overall_passed)
+            report(6, stage="sandbox", status=test_result.status, passed=test_result.overall_passed)
+            
+            if not test_result.overall_passed:
+                logger.warning("Sandbox tests failed!")
+                if test_result.validation and test_result.validation.errors:
+                    logger.info("Validation errors: %s", len(test_result.validation.errors))
+                for scan in test_result.security_scans:
+                    if not scan.passed:
+                        logger.info("Security issues: %s critical, %s high", scan.critical_issues, scan.high_issues)
+            
+        except Exception as e:
+            logger.exception("Sandbox testing failed: %s", e)
+    elif request.run_sandbox_test and not terraform_available:
+        logger.info("[6/6] Sandbox testing skipped (Terraform not installed)")
+        logger.info("Install Terraform from: https://www.terraform.io/downloads")
+    else:
+        logger.info("[6/6] Sandbox testing skipped (disabled)")
+    
+    logger.info("GENERATION PIPELINE COMPLETE")
+    
+    message = "Terraform code generated successfully"
+    if sandbox_result:
+        message += " and tested in sandbox"
+    elif request.run_sandbox_test and not terraform_available:
+        message += " (sandbox testing unavailable - Terraform not installed)"
+    
+    response = GenerateResponse(
+        terraform_code=final_code,
+        validation_summary=validation_summary,
+        requirements=request.requirements,
+        variables=validated_variables,
+        used_variables=used_vars,
+        unused_variables=unused_vars,
+        sandbox_test_result=sandbox_result,
+        sandbox_test_available=terraform_available,
+        message=message
+    )
+    generate_cache.put(request.query, response, cache_scope, query_embedding)
+    return response
+
 
 @app.post("/api/extract-github", response_model=GitHubExtractionResponse)
 async def extract_from_github(request: GitHubExtractionRequest):
     """Extract Terraform code from GitHub repositories"""
-    if not request.github_token:
-        raise HTTPException(status_code=400, detail="GitHub token is required")
+    headers = github_request_headers(request)
     
-    if not request.repositories:
-        raise HTTPException(status_code=400, detail="No repositories provided")
-    
-    print(f"\n{'='*70}")
-    print(f"GITHUB EXTRACTION STARTED")
-    print(f"{'='*70}")
-    print(f"Repositories to process: {len(request.repositories)}")
+    logger.info("GITHUB EXTRACTION STARTED")
+    logger.info("Repositories to process: %s", len(request.repositories))
     
     all_files = []
     repos_processed = 0
     
-    headers = {
-        'Authorization': f'Bearer {request.github_token}',
-        'Accept': 'application/vnd.github.v3+json'
-    }
-    
-    for repo in request.repositories:
-        try:
-            print(f"\nProcessing: {repo.full_name}")
-            
-            files = extract_terraform_from_repo(
-                repo.full_name,
-                repo.html_url,
-                headers
+    # One semaphore bounds fan-out across every repository to respect GitHub's secondary rate limits
+    semaphore = asyncio.Semaphore(GITHUB_MAX_CONCURRENT_REQUESTS)
+    results = await asyncio.gather(
+        *[
+            extract_terraform_from_repo(
+                repo.full_name, repo.html_url, app.state.github_client, semaphore, headers
             )
-            
-            all_files.extend(files)
-            repos_processed += 1
-            
-            print(f"   Extracted {len(files)} Terraform files")
-            
-        except Exception as e:
-            print(f"   ERROR processing {repo.full_name}: {e}")
+            for repo in request.repositories
+        ],
+        return_exceptions=True
+    )
+    
+    for repo, files in zip(request.repositories, results):
+        logger.info("Processing: %s", repo.full_name)
+        if isinstance(files, Exception):
+            logger.error("Error processing %s: %s", repo.full_name, files)
             continue
+        
+        all_files.extend(files)
+        repos_processed += 1
+        
+        logger.info("Extracted %s Terraform files", len(files))
     
-    print(f"\n{'='*70}")
-    print(f"EXTRACTION COMPLETE")
-    print(f"{'='*70}")
-    print(f"Repositories processed: {repos_processed}/{len(request.repositories)}")
-    print(f"Total Terraform files extracted: {len(all_files)}")
+    logger.info("EXTRACTION COMPLETE")
+    logger.info("Repositories processed: %s/%s", repos_processed, len(request.repositories))
+    logger.info("Total Terraform files extracted: %s", len(all_files))
     
     return GitHubExtractionResponse(
         status="success",
@@ -469,6 +664,81 @@ async def extract_from_github(request: GitHubExtractionRequest):
         message=f"Successfully extracted {len(all_files)} Terraform files from {repos_processed} repositories"
     )
 
+@app.post("/api/extract-github/stream")
+async def extract_from_github_stream(request: GitHubExtractionRequest):
+    """Stream file refs as NDJSON as soon as each file is parsed, then a summary line"""
+    headers = github_request_headers(request)
+    logger.info("GITHUB EXTRACTION STARTED (streaming, %s repositories)", len(request.repositories))
+    
+    files: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(GITHUB_MAX_CONCURRENT_REQUESTS)
+    
+    async def event_stream():
+        extraction = asyncio.gather(
+            *[
+                extract_terraform_from_repo(
+                    repo.full_name, repo.html_url, app.state.github_client, semaphore, headers,
+                    on_file=files.put_nowait
+                )
+                for repo in request.repositories
+            ],
+            return_exceptions=True
+        )
+        # None marks the end; it is queued after every file already reported
+        extraction.add_done_callback(lambda _: files.put_nowait(None))
+        
+        total_files = 0
+        while (tf_file := await files.get()) is not None:
+            total_files += 1
+            yield to_json({"type": "file", **dict(tf_file)}) + b"\n"
+        
+        errors = {}
+        for repo, result in zip(request.repositories, extraction.result()):
+            if isinstance(result, Exception):
+                logger.error("Error processing %s: %s", repo.full_name, result)
+                errors[repo.full_name] = str(result)
+        
+        logger.info("Streamed %s Terraform files", total_files)
+        yield to_json({
+            "type": "summary",
+            "repositories_processed": len(request.repositories) - len(errors),
+            "total_files": total_files,
+            "errors": errors
+        }) + b"\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.get("/api/extract-github/file/{owner}/{repo}/{sha}", response_class=PlainTextResponse)
+async def get_extracted_file(owner: str, repo: str, sha: str, authorization: str = Header(default="")):
+    """Return the body of an extracted Terraform file
+
+    The blob is fetched from GitHub with the caller's own token, sent as
+    `Authorization: Bearer <token>`, so only someone who can read the repository
+    gets the file, and any worker can answer.
+    """
+    if not authorization.startswith('Bearer ') or not authorization[7:].strip():
+        raise HTTPException(status_code=401, detail="GitHub token is required")
+    if not all(GITHUB_NAME_PATTERN.fullmatch(part) and part.strip('.') for part in (owner, repo)):
+        raise HTTPException(status_code=400, detail="Invalid repository name")
+    if not GIT_SHA_PATTERN.fullmatch(sha):
+        raise HTTPException(status_code=400, detail="Invalid blob sha")
+    
+    try:
+        response = await app.state.github_client.get(
+            f"https://api.github.com/repos/{owner}/{repo}/git/blobs/{sha}",
+            headers={'Authorization': authorization, 'Accept': 'application/vnd.github.raw'}
+        )
+    except httpx.HTTPError as e:
+        logger.warning("Fetching blob %s from %s/%s failed: %s", sha, owner, repo, e)
+        raise HTTPException(status_code=502, detail="GitHub request failed")
+    
+    # GitHub answers 404 for private repositories the token can't see
+    if response.status_code in (401, 403, 404):
+        raise HTTPException(status_code=response.status_code, detail="File not found or not accessible with this token")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"GitHub returned {response.status_code}")
+    return PlainTextResponse(response.content.decode('utf-8', errors='replace'))
+
 @app.post("/api/test-sandbox", response_model=SandboxTestResponse)
 async def test_in_sandbox(request: SandboxTestRequest):
     """Test Terraform code in isolated sandbox"""
@@ -485,142 +755,191 @@ async def test_in_sandbox(request: SandboxTestRequest):
         raise HTTPException(status_code=400, detail="Terraform code cannot be empty")
     
     try:
-        print(f"\n{'='*70}")
-        print(f"SANDBOX TESTING STARTED")
-        print(f"{'='*70}")
+        logger.info("SANDBOX TESTING STARTED")
         
         # Test the code
-        result = sandbox_tester.test_terraform_code(
+        result = await sandbox_tester.test_terraform_code(
             terraform_code=request.terraform_code,
             run_security_scan=request.run_security_scan,
             generate_plan=request.generate_plan
         )
         
         # Convert result to response model
-        response = SandboxTestResponse(
-            status=result.status,
-            timestamp=result.timestamp,
-            validation=ValidationResultModel(**result.validation.__dict__) if result.validation else None,
-            security_scans=[SecurityScanResultModel(**scan.__dict__) for scan in result.security_scans],
-            plan_output=result.plan_output,
-            overall_passed=result.overall_passed,
-            summary=result.summary
-        )
+        response = SandboxTestResponse.model_validate(result)
         
-        print(f"\n{'='*70}")
-        print(f"SANDBOX TESTING COMPLETE")
-        print(f"{'='*70}")
-        print(f"Status: {result.status}")
-        print(f"Overall passed: {result.overall_passed}")
+        logger.info("SANDBOX TESTING COMPLETE")
+        logger.info("Status: %s", result.status)
+        logger.info("Overall passed: %s", result.overall_passed)
         
         return response
         
     except Exception as e:
-        print(f"ERROR: Sandbox testing failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Sandbox testing failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def extract_terraform_from_repo(
+# Directory names whose contents are never extracted, and the file types that are
+SKIP_SEGMENTS = frozenset({'.git', '.terraform', 'test', 'tests', 'examples', 'example', '.github'})
+TERRAFORM_SUFFIXES = ('.tf', '.tfvars', '.hcl')
+
+
+def github_request_headers(request: GitHubExtractionRequest) -> Dict[str, str]:
+    """Validate an extraction request and build its GitHub API headers"""
+    if not request.github_token:
+        raise HTTPException(status_code=400, detail="GitHub token is required")
+    
+    if not request.repositories:
+        raise HTTPException(status_code=400, detail="No repositories provided")
+    
+    return {
+        'Authorization': f'Bearer {request.github_token}',
+        'Accept': 'application/vnd.github.v3+json'
+    }
+
+
+def github_retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying a GitHub response, or None if it should not be retried"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        delay = float(retry_after)
+    elif response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+        # Primary rate limit: wait for the window to reset
+        delay = float(response.headers.get('X-RateLimit-Reset', 0)) - time.time()
+    elif response.status_code in GITHUB_RETRY_STATUSES:
+        delay = 0.5 * 2 ** attempt
+    else:
+        return None
+    # A reset further out than the cap can't be waited for inside one request
+    return max(delay, 0) if delay <= GITHUB_MAX_BACKOFF else None
+
+
+def github_rate_limit_pause(response: httpx.Response) -> float:
+    """Seconds to pause so the remaining rate-limit budget lasts until the window resets"""
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if not remaining or not remaining.isdigit() or int(remaining) >= GITHUB_RATE_LIMIT_LOW:
+        return 0
+    window = float(response.headers.get('X-RateLimit-Reset', 0)) - time.time()
+    return min(max(window, 0) / (int(remaining) + 1), GITHUB_MAX_BACKOFF)
+
+
+async def extract_terraform_from_repo(
     repo_full_name: str,
     repo_url: str,
-    headers: dict
-) -> List[TerraformFileData]:
-    """Extract all Terraform files from a single repository"""
-    files = []
-    skip_dirs = ['.git', '.terraform', 'test', 'tests', 'examples', 'example', '.github']
-    
-    resource_pattern = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"')
-    module_pattern = re.compile(r'module\s+"([^"]+)"\s*\{[^}]*source\s*=\s*"([^"]+)"', re.DOTALL)
-    provider_pattern = re.compile(r'provider\s+"([^"]+)"')
-    variable_pattern = re.compile(r'variable\s+"([^"]+)"')
-    output_pattern = re.compile(r'output\s+"([^"]+)"')
-    
-    def fetch_contents(path: str = ""):
-        url = f"https://api.github.com/repos/{repo_full_name}/contents/{path}" if path else \
-              f"https://api.github.com/repos/{repo_full_name}/contents"
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    headers: Dict[str, str],
+    on_file: Optional[Callable[[TerraformFileRef], None]] = None
+) -> List[TerraformFileRef]:
+    """Extract all Terraform files from a single repository; on_file sees each one as it is ready"""
+    loop = asyncio.get_running_loop()
+    
+    async def github_get(url: str, **kwargs) -> httpx.Response:
+        request_headers = {**headers, **kwargs.pop('headers', {})}
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            async with semaphore:
+                response = await client.get(url, headers=request_headers, **kwargs)
+            delay = github_retry_delay(response, attempt)
+            if delay is None or attempt == GITHUB_MAX_RETRIES:
+                break
+            logger.warning("GitHub returned %s for %s, retrying in %.1fs", response.status_code, url, delay)
+            # Sleep outside the semaphore so other downloads keep their slots
+            await asyncio.sleep(delay)
+        if response.status_code != 304:
+            response.raise_for_status()
+        pause = github_rate_limit_pause(response)
+        if pause:
+            logger.warning("GitHub rate limit nearly exhausted, pausing %.1fs", pause)
+            await asyncio.sleep(pause)
+        return response
+    
+    async def fetch_file(entry: dict) -> Optional[TerraformFileRef]:
+        cache_key = (repo_full_name, entry['path'])
+        cached = blob_cache.get(cache_key)
+        if cached and cached.sha == entry['sha']:
+            return cached
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                return response.json()
+            # The raw media type returns the blob body directly instead of base64 JSON
+            file_response = await github_get(
+                entry['url'],
+                headers={'Accept': 'application/vnd.github.raw'}
+            )
+            # Size the raw body before decoding instead of re-encoding the text afterwards
+            raw = file_response.content
+            content = raw.decode('utf-8', errors='replace')
+            # Parsing runs in the pool while other downloads keep going on the event loop
+            file_type, resources, modules, providers, variables, outputs = await loop.run_in_executor(
+                app.state.parse_pool, parse_file, content, entry['path']
+            )
+            # Unpickling makes fresh strings; re-intern the names that recur across every file
+            providers = [sys.intern(name) for name in providers]
+            modules = [sys.intern(source) for source in modules]
+            
+            # Every field comes from GitHub's tree entry or our own parser, so skip re-validation
+            tf_file = TerraformFileRef.model_construct(
+                path=entry['path'],
+                sha=entry['sha'],
+                repo_name=repo_full_name,
+                file_type=file_type,
+                resources=resources,
+                modules=modules,
+                providers=providers,
+                variables=variables,
+                outputs=outputs,
+                size_bytes=len(raw)
+            )
+            # Dicts keep insertion order, so these evict the oldest entries
+            if len(blob_cache) >= BLOB_CACHE_MAX_ENTRIES:
+                blob_cache.pop(next(iter(blob_cache)))
+            blob_cache[cache_key] = tf_file
+            return tf_file
         except Exception as e:
-            print(f"      WARNING: Error fetching {path}: {e}")
-        return []
-    
-    def classify_file_type(filepath: str, content: str) -> str:
-        filename = filepath.lower()
-        if 'variables' in filename or filename.startswith('vars'):
-            return 'variables'
-        elif 'outputs' in filename:
-            return 'outputs'
-        elif 'providers' in filename or 'terraform' in filename:
-            return 'providers'
-        elif 'modules' in filename or '/modules/' in filepath:
-            return 'module'
-        elif 'main' in filename:
-            return 'main'
-        elif content.strip().startswith('terraform {'):
-            return 'terraform_config'
-        else:
-            return 'resource'
-    
-    def parse_terraform_content(content: str) -> dict:
-        resources = [f"{m[0]}.{m[1]}" for m in resource_pattern.findall(content)]
-        modules = [m[1] for m in module_pattern.findall(content)]
-        providers = list(set(provider_pattern.findall(content)))
-        variables = variable_pattern.findall(content)
-        outputs = output_pattern.findall(content)
-        
-        return {
-            'resources': resources,
-            'modules': modules,
-            'providers': providers,
-            'variables': variables,
-            'outputs': outputs
-        }
+            logger.warning("Error processing %s: %s", entry['path'], e)
+            return None
     
-    def process_item(item: dict):
-        if item['type'] == 'dir':
-            if any(skip in item['path'] for skip in skip_dirs):
-                return
-            sub_contents = fetch_contents(item['path'])
-            for sub_item in sub_contents:
-                process_item(sub_item)
-        
-        elif item['type'] == 'file':
-            if item['name'].endswith('.tf') or item['name'].endswith('.tfvars') or item['name'].endswith('.hcl'):
-                try:
-                    file_response = requests.get(item['download_url'], headers=headers, timeout=10)
-                    
-                    if file_response.status_code == 200:
-                        content = file_response.text
-                        parsed = parse_terraform_content(content)
-                        file_type = classify_file_type(item['path'], content)
-                        
-                        tf_file = TerraformFileData(
-                            path=item['path'],
-                            content=content,
-                            repo_name=repo_full_name,
-                            file_type=file_type,
-                            resources=parsed['resources'],
-                            modules=parsed['modules'],
-                            providers=parsed['providers'],
-                            variables=parsed['variables'],
-                            outputs=parsed['outputs'],
-                            size_bytes=len(content.encode('utf-8'))
-                        )
-                        
-                        files.append(tf_file)
-                        
-                except Exception as e:
-                    print(f"      WARNING: Error processing {item['path']}: {e}")
-    
-    contents = fetch_contents()
-    for item in contents:
-        process_item(item)
+    # One recursive tree listing replaces the directory-by-directory contents walk;
+    # HEAD resolves to the default branch, so no separate repository lookup is needed
+    cached_tree = repo_tree_cache.get(repo_full_name)
+    
+    tree_response = await github_get(
+        f"https://api.github.com/repos/{repo_full_name}/git/trees/HEAD",
+        params={'recursive': 1},
+        headers={'If-None-Match': cached_tree[0]} if cached_tree and cached_tree[0] else {}
+    )
+    
+    # 304 or an unchanged tree SHA means nothing in the repository changed since the last extraction
+    if cached_tree and (
+        tree_response.status_code == 304 or tree_response.json()['sha'] == cached_tree[1]
+    ):
+        if on_file:
+            for tf_file in cached_tree[2]:
+                on_file(tf_file)
+        return cached_tree[2]
+    
+    tree = tree_response.json()
     
+    if tree.get('truncated'):
+        logger.warning("Tree listing for %s was truncated by GitHub", repo_full_name)
+    
+    entries = [
+        entry for entry in tree['tree']
+        if entry['type'] == 'blob'
+        and entry['path'].endswith(TERRAFORM_SUFFIXES)
+        # Match whole path segments so e.g. 'my-tests-runner' is not skipped
+        and SKIP_SEGMENTS.isdisjoint(entry['path'].split('/')[:-1])
+    ]
+    
+    async def fetch_and_report(entry: dict) -> Optional[TerraformFileRef]:
+        tf_file = await fetch_file(entry)
+        if tf_file is not None and on_file:
+            on_file(tf_file)
+        return tf_file
+    
+    results = await asyncio.gather(*[fetch_and_report(entry) for entry in entries])
+    files = [tf_file for tf_file in results if tf_file is not None]
+    # Only cache complete extractions so failed downloads are retried next time
+    if len(files) == len(entries):
+        repo_tree_cache[repo_full_name] = (tree_response.headers.get('ETag'), tree['sha'], files)
     return files
 
 
@@ -646,4 +965,18 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("ENV", "dev") == "dev":
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # One worker per core on uvloop + httptools; reload is dev-only and forces a single worker.
+        # Each worker has a single event loop, so handlers must keep blocking work in
+        # to_thread/executors or they stall every request on that worker
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WORKERS", os.cpu_count())),
+            loop="uvloop",
+            http="httptools",
+            reload=False
+        )
@@ -1,17 +1,256 @@
 from pinecone import Pinecone
 from sentence_transformers import SentenceTransformer
 import os
+import copy
+import contextvars
 import json
+import logging
+import hashlib
+import heapq
+import ipaddress
 import re
+import time
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
 from google import genai
-from typing import Dict, List, Tuple, Optional
+from google.genai import types
+from pydantic import BaseModel, ConfigDict, ValidationError
+from pydantic_core import from_json, to_json
+from typing import Callable, Dict, List, Literal, Tuple, Optional, Type
 from dataclasses import dataclass
 from enum import Enum
+from bisect import bisect_right
+
+# Optional C automaton for scanning many variable values in one pass
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 from dotenv import load_dotenv  
 load_dotenv()
 
+# Per-request progress goes to DEBUG; the app entry point owns the handlers
+log = logging.getLogger("autoterra.rag")
+
+# Set while a quiet RAGSystem is working; its progress records below WARNING are
+# dropped without touching the logger's level, which every other instance shares
+QUIET_RUN = contextvars.ContextVar("autoterra_rag_quiet", default=False)
+
+
+class QuietRunFilter(logging.Filter):
+    """Drops progress records logged on behalf of a quiet RAGSystem"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or not QUIET_RUN.get()
+
+
+log.addFilter(QuietRunFilter())
+
+
+def submit_in_context(pool: ThreadPoolExecutor, fn: Callable, *args, **kwargs):
+    """Submit fn with a copy of the caller's context, so a quiet run stays quiet in worker threads"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+NEWLINE_PATTERN = re.compile(r'\n')
+
+# Model response cleanup, compiled once instead of on every call
+JSON_FENCE_START_PATTERN = re.compile(r'^```(?:json)?\s*')
+JSON_FENCE_END_PATTERN = re.compile(r'\s*```$')
+JSON_DECODER = json.JSONDecoder()
+# Strips every fence, with or without a language tag
+CODE_FENCE_PATTERN = re.compile(r'```(?:hcl|terraform|tf)?\n?')
+TERRAFORM_KEYWORD_PATTERN = re.compile(r'resource|variable|output|data|locals|terraform|provider')
+EXPLANATION_PATTERN = re.compile(r'here is|this code|explanation:|note:|this will|the above|this terraform', re.IGNORECASE)
+RESOURCE_BLOCK_PATTERN = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{')
+TERRAFORM_IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+AWS_REGION_PATTERN = re.compile(r'^[a-z]+-[a-z]+-\d+$')
+S3_BUCKET_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9.-]{1,61}[a-z0-9]$')
+RDS_INSTANCE_CLASS_PATTERN = re.compile(r'^db\.[a-z0-9]+\.[a-z0-9]+$')
+
+# Keywords the reranker's security pass looks for, one bit each in a presence mask
+SECURITY_KEYWORDS = ('hardcoded', 'password', 'public', 'bucket', 'encryption', 'kms', 'iam', 'policy')
+SECURITY_KEYWORD_BITS = {keyword: 1 << bit for bit, keyword in enumerate(SECURITY_KEYWORDS)}
+if ahocorasick is not None:
+    SECURITY_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword, keyword_bit in SECURITY_KEYWORD_BITS.items():
+        SECURITY_KEYWORD_AUTOMATON.add_word(keyword, keyword_bit)
+    SECURITY_KEYWORD_AUTOMATON.make_automaton()
+else:
+    SECURITY_KEYWORD_AUTOMATON = None
+
+# Prompt skeletons, filled in with str.format; literal braces are doubled
+VALIDATION_PROMPT_TEMPLATE = """You are an AWS Terraform expert validator. Analyze these user-provided variables for a {resource_type} resource.
+
+USER VARIABLES:
+{variables}
+
+VALIDATION RULES:
+{rules}
+
+TASKS:
+1. Validate EACH variable against AWS requirements
+2. Identify invalid values that will cause AWS to FAIL
+3. Provide corrected values with high accuracy
+4. Assign severity: 'error' (will cause AWS failure), 'warning' (suboptimal), 'info' (style)
+5. Rate your confidence in auto-correction (0.0-1.0)
+
+CRITICAL FOCUS AREAS:
+- S3 ACL values: "yes", "no", "true", "false" are INVALID → suggest valid ACL
+- Boolean values: Convert yes/no/enabled/disabled to true/false
+- AWS regions: Check format and spelling
+- Instance types: Verify they exist
+- Naming conventions: Ensure AWS compliance
+
+Respond ONLY with JSON (no markdown, no preamble):
+{{
+  "corrected_variables": {{
+    "field_name": "corrected_value"
+  }},
+  "fields": {{
+    "field_name": {{
+      "is_valid": true/false,
+      "original_value": "value",
+      "corrected_value": "corrected_value",
+      "issue_type": "invalid_acl|invalid_region|invalid_boolean|naming_issue|etc",
+      "severity": "error|warning|info",
+      "message": "Clear explanation of what's wrong and why it will fail",
+      "auto_correct_confidence": 0.0-1.0,
+      "reasoning": "Why this correction was made"
+    }}
+  }},
+  "overall_assessment": "Brief summary"
+}}
+"""
+
+GENERATOR_PROMPT_TEMPLATE = """You are a Terraform code generator. Generate ONLY valid Terraform HCL code.
+
+User Request: {query}
+
+{variable_instructions}
+
+Reference Documentation (use as guidance for structure):
+{context_text}
+
+CRITICAL RULES - FAILURE TO FOLLOW WILL REQUIRE REGENERATION:
+1. EVERY user-provided value MUST appear EXACTLY as given in the code
+2. DO NOT use placeholder values like "example", "my-bucket", "test" - use the EXACT values provided
+3. Return ONLY Terraform code - NO explanations, NO markdown blocks
+4. Use proper Terraform HCL syntax with correct indentation (2 spaces)
+5. All strings must be properly quoted
+6. All brackets must be balanced and closed
+7. Include brief inline comments (using #) only for complex logic
+
+Generate the complete Terraform code now:
+"""
+
+FIX_PROMPT_TEMPLATE = """The following Terraform code is INCOMPLETE. It is MISSING required user values.
+
+INCOMPLETE CODE:
+{terraform_code}
+
+MISSING VALUES THAT MUST BE ADDED:
+{unused_details}
+
+INSTRUCTIONS:
+1. Identify where each missing value should be used in the Terraform resource
+2. Add the EXACT values (not placeholders) to the appropriate resource arguments
+3. Keep all existing code structure
+4. Return ONLY the complete corrected Terraform code
+5. NO explanations, NO markdown
+
+Corrected complete code:
+"""
+
+# Fixed instructions for ReflectionQA refinement; each request only carries the code and missing values
+REFINEMENT_INSTRUCTIONS = """You are a Terraform fixer. You receive Terraform code that is MISSING required user values, followed by those values.
+
+Do NOT rewrite the code. Return only the edits that add each missing value:
+1. resource_block: the resource to change, as TYPE.NAME (e.g. aws_s3_bucket.main)
+2. attribute: the top-level argument of that resource that should hold the value
+3. value: the EXACT user value (not a placeholder)
+
+Respond in JSON:
+{"edits": [{"resource_block": "aws_s3_bucket.main", "attribute": "bucket", "value": "data-prod"}]}"""
+
+REFINEMENT_PROMPT_TEMPLATE = """INCOMPLETE CODE:
+{terraform_code}
+
+MISSING VALUES (MUST ADD ALL OF THESE):
+{missing_values}
+
+Edits as JSON:
+"""
+
+# Fixed checklists for the batched review agents; each request only carries the code and values
+REVIEW_INSTRUCTIONS = """Review the given Terraform code as three independent reviewers.
+
+[validator] Check correctness and completeness:
+1. Terraform syntax errors
+2. Missing required resource arguments
+3. Proper resource naming conventions
+4. Valid Terraform structure
+5. Correct indentation and formatting
+
+[security] Check for security issues:
+1. Hardcoded secrets or credentials
+2. Public access configurations
+3. Missing encryption settings
+4. IAM policy issues
+5. Network security concerns
+
+[cost_optimizer] Check for cost optimization:
+1. Over-provisioned resources
+2. Missing cost-saving features
+3. Unnecessary data transfer costs
+4. Storage optimization opportunities
+
+Then decide for the code as a whole:
+- "status": "ok" when nothing must be fixed, otherwise "needs_fix"
+- "edits": the fixes that set a single top-level argument of a resource, each as
+  {"resource_block": "TYPE.NAME", "attribute": "argument name", "value": "exact value"};
+  leave out anything larger, and never change a user-provided value
+
+Respond in JSON format, one result per reviewer plus the decision:
+{
+    "validator": {
+        "is_valid": true/false,
+        "issues": ["list of all issues including missing user values"],
+        "suggestions": ["improvements"],
+        "score": 0.0-1.0
+    },
+    "security": {
+        "is_valid": true/false,
+        "issues": ["list of security issues"],
+        "suggestions": ["list of security improvements"],
+        "score": 0.0-1.0
+    },
+    "cost_optimizer": {
+        "is_valid": true/false,
+        "issues": ["list of cost issues"],
+        "suggestions": ["list of cost optimizations"],
+        "score": 0.0-1.0
+    },
+    "status": "ok" or "needs_fix",
+    "edits": [{"resource_block": "aws_s3_bucket.main", "attribute": "acl", "value": "private"}]
+}"""
+
+REVIEW_PROMPT_TEMPLATE = """Terraform code to review:
+
+{terraform_code}
+
+User-Provided Values That MUST Be Present:
+{variables}
+
+Already Identified Issues:
+{issues}
+
+Respond with the JSON object described in your instructions.
+"""
+
 
 class SearchStrategy(Enum):
     """Enumeration of different search strategies"""
@@ -20,7 +259,7 @@ class SearchStrategy(Enum):
     CODE = "code"
 
 
-@dataclass
+@dataclass(slots=True)
 class RetrievalResult:
     """Data class for retrieval results"""
     content: str
@@ -29,7 +268,7 @@ class RetrievalResult:
     strategy: SearchStrategy
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Data class for validation results"""
     is_valid: bool
@@ -38,7 +277,7 @@ class ValidationResult:
     score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationIssue:
     """Represents a validation issue found in user input"""
     field: str
@@ -49,7 +288,7 @@ class ValidationIssue:
     suggested_correction: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CorrectionResult:
     """Result of input correction"""
     corrected_variables: Dict
@@ -58,6 +297,297 @@ class CorrectionResult:
     needs_confirmation: List[ValidationIssue]
 
 
+# Response schemas: Gemini's structured output mode is given these, and answers are validated against them
+class RelevanceScores(BaseModel):
+    """Reranker answer: one relevance score per document"""
+    scores: List[float] = []
+
+
+class AgentReview(BaseModel):
+    """One review agent's verdict"""
+    is_valid: bool = True
+    issues: List[str] = []
+    suggestions: List[str] = []
+    score: float = 0.8
+
+
+class ResourceEdit(BaseModel):
+    """Set one top-level argument of a resource block"""
+    resource_block: str
+    attribute: str
+    value: str
+
+
+class ReviewBatch(BaseModel):
+    """Batched review answer, keyed by reviewer, with the combined fix decision"""
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+    
+    validator: AgentReview = AgentReview()
+    security: AgentReview = AgentReview()
+    cost_optimizer: AgentReview = AgentReview()
+    status: Literal["ok", "needs_fix"] = "ok"
+    edits: List[ResourceEdit] = []
+
+
+class RefinementEdits(BaseModel):
+    """ReflectionQA refinement answer: edits applied locally instead of a rewritten file"""
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+    
+    edits: List[ResourceEdit] = []
+
+
+class QueryRequirements(BaseModel):
+    """Query understanding answer"""
+    # Extracted values such as counts or sizes may come back as JSON numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+    
+    resource_type: str = "infrastructure"
+    user_provided_values: Dict[str, str] = {}
+    required_variables: List[str] = []
+    optional_configs: List[str] = []
+
+
+def create_context_cache(gemini_client: genai.Client, model_name: str, contents: List[str],
+                         ttl: str = "300s", system_instruction: Optional[str] = None) -> Optional[str]:
+    """Cache a static prompt prefix (and optional system instruction) with Gemini and return its name.
+
+    Returns None when caching is unavailable (e.g. the prefix is below the
+    model's minimum cacheable size), so callers fall back to inline prompts.
+    """
+    try:
+        cache = gemini_client.caches.create(
+            model=model_name,
+            config=types.CreateCachedContentConfig(
+                contents=contents or None, system_instruction=system_instruction, ttl=ttl
+            )
+        )
+        return cache.name
+    except Exception as e:
+        log.debug("Context caching unavailable, sending context inline: %s", e)
+        return None
+
+
+class SystemInstructionCache:
+    """Fixed system instructions held in a Gemini context cache, renewed a minute before expiry.
+
+    Until the cache exists (or when Gemini refuses it, e.g. below the minimum
+    cacheable size) the instructions are sent inline with every request.
+    """
+    
+    def __init__(self, gemini_client: genai.Client, model_name: str, instruction: str, ttl: int = 3600):
+        self.gemini_client = gemini_client
+        self.model_name = model_name
+        self.instruction = instruction
+        self.ttl = ttl
+        # (cache name, expires_at); a None name means caching was refused
+        self._cache: Optional[Tuple[Optional[str], float]] = None
+        self._lock = threading.Lock()
+    
+    def name(self) -> Optional[str]:
+        """Name of a live cache holding the instructions, creating it when needed"""
+        with self._lock:
+            if self._cache and self._cache[1] > time.time():
+                return self._cache[0]
+            
+            name = create_context_cache(
+                self.gemini_client, self.model_name, [],
+                ttl=f"{self.ttl}s", system_instruction=self.instruction
+            )
+            # A refusal is remembered for the same period so it is not retried on every call
+            self._cache = (name, time.time() + self.ttl - 60)
+            return name
+    
+    def config(self) -> types.GenerateContentConfig:
+        """Request config pointing at the cache, or carrying the instructions inline"""
+        name = self.name()
+        if name:
+            return types.GenerateContentConfig(cached_content=name)
+        return types.GenerateContentConfig(system_instruction=self.instruction)
+    
+    def invalidate(self):
+        """Forget the cache after a failed call; it may have been evicted early"""
+        with self._lock:
+            self._cache = None
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove markdown code fences, skipping the regex pass when there are none"""
+    if '```' not in text:
+        return text
+    return CODE_FENCE_PATTERN.sub('', text)
+
+
+def matching_brace(code: str, start: int) -> Optional[int]:
+    """Index of the brace closing the block opened just before start, ignoring strings.
+
+    With start=0 this checks the whole file: it returns len(code) when every
+    brace is balanced and None otherwise.
+    """
+    depth = 1 if start else 0
+    in_string = escaped = False
+    for i in range(start, len(code)):
+        char = code[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth < 0:
+                return None
+            if start and not depth:
+                return i
+    return len(code) if not start and not depth and not in_string else None
+
+
+def is_plain_terraform_string(value: str) -> bool:
+    """Whether value can go between double quotes in HCL without escapes or interpolation"""
+    return not any(c in value for c in '"\\\n') and '${' not in value and '%{' not in value
+
+
+def apply_resource_edits(code: str, edits: List[ResourceEdit]) -> Optional[str]:
+    """Set each edit's attribute inside its resource block, replacing or adding the line.
+
+    Returns None if any edit can't be applied safely (unknown block, nested or
+    multi-line argument, a value needing escapes), so the caller can fall back
+    to a full rewrite.
+    """
+    if not edits or matching_brace(code, 0) != len(code):
+        return None
+    
+    for edit in edits:
+        block_type, _, block_name = edit.resource_block.removeprefix('resource.').partition('.')
+        if not block_name or not TERRAFORM_IDENTIFIER_PATTERN.match(edit.attribute):
+            return None
+        if not is_plain_terraform_string(edit.value):
+            return None
+        
+        block = re.search(rf'resource\s+"{re.escape(block_type)}"\s+"{re.escape(block_name)}"\s*\{{', code)
+        if block is None:
+            return None
+        close = matching_brace(code, block.end())
+        if close is None:
+            return None
+        
+        body = code[block.end():close]
+        # The same name inside a nested block (e.g. tags) is a different argument
+        existing = next((
+            match for match in re.finditer(rf'^([ \t]*){re.escape(edit.attribute)}\s*=(.*)$', body, re.MULTILINE)
+            if body.count('{', 0, match.start()) == body.count('}', 0, match.start())
+        ), None)
+        if existing:
+            rhs = existing.group(2).strip()
+            # Only a single-line argument can be rewritten in place
+            if not rhs or rhs[-1] in '{[(' or rhs.startswith('<<'):
+                return None
+            start = block.end() + existing.start()
+            end = block.end() + existing.end()
+            code = f'{code[:start]}{existing.group(1)}{edit.attribute} = "{edit.value}"{code[end:]}'
+            continue
+        
+        line = f'  {edit.attribute} = "{edit.value}"\n'
+        line_start = code.rfind('\n', 0, close) + 1
+        if code[line_start:close].strip():
+            # Closing brace shares a line with other content, e.g. `{}`
+            code = code[:close] + '\n' + line + code[close:]
+        else:
+            code = code[:line_start] + line + code[line_start:]
+    return code
+
+
+def parse_json_body(text: str) -> Optional[Dict]:
+    """Parse the JSON object in a model answer, ignoring any prose around it.
+
+    The span from the first '{' to the last '}' is tried first. If trailing text
+    holds stray braces, raw_decode reads exactly one object from the first '{'.
+    Returns None when there is no parseable object.
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end < start:
+        return None
+    try:
+        return from_json(text[start:end + 1])
+    except ValueError:
+        pass
+    try:
+        return JSON_DECODER.raw_decode(text, start)[0]
+    except ValueError:
+        return None
+
+
+def stream_json_response(gemini_client: genai.Client, model_name: str, contents: str,
+                         config: Optional[types.GenerateContentConfig] = None) -> str:
+    """Stream a JSON answer, returning as soon as its first top-level object closes.
+
+    Anything the model appends after the object is never waited for. Returns
+    the whole text if no object closes, so callers' parsing fallbacks still apply.
+    """
+    parts = []
+    depth = 0
+    in_string = escaped = False
+    stream = gemini_client.models.generate_content_stream(model=model_name, contents=contents, config=config)
+    # Leaving early closes the HTTP stream right away rather than whenever it is collected
+    with closing(stream):
+        for chunk in stream:
+            text = chunk.text
+            if not text:
+                continue
+            for i, char in enumerate(text):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == '\\':
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '{':
+                    depth += 1
+                elif depth and char == '"':
+                    in_string = True
+                elif depth and char == '}':
+                    depth -= 1
+                    if not depth:
+                        parts.append(text[:i + 1])
+                        return ''.join(parts)
+            parts.append(text)
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def response_json_schema(schema: Type[BaseModel]) -> Dict:
+    """JSON Schema of a response model, built once per model.
+
+    Passed as response_json_schema rather than response_schema: the Developer
+    API only accepts free-form mappings (additionalProperties) through it.
+    """
+    return schema.model_json_schema()
+
+
+def generate_json(gemini_client: genai.Client, model_name: str, contents: str, schema: Type[BaseModel],
+                  config: Optional[types.GenerateContentConfig] = None) -> Optional[BaseModel]:
+    """Stream an answer in Gemini's structured output mode and validate it against schema.
+
+    Returns None when the answer still doesn't fit (e.g. it was cut off);
+    errors from the request itself propagate.
+    """
+    structured = {'response_mime_type': 'application/json', 'response_json_schema': response_json_schema(schema)}
+    config = config.model_copy(update=structured) if config else types.GenerateContentConfig(**structured)
+    response_text = stream_json_response(gemini_client, model_name, contents, config)
+    try:
+        return schema.model_validate_json(response_text)
+    except ValidationError as e:
+        log.debug("%s answer did not match its schema: %s", schema.__name__, e)
+        return None
+
+
 class LLMInputValidator:
     """
     Uses Gemini LLM to intelligently validate and auto-correct user inputs
@@ -104,21 +634,46 @@ class LLMInputValidator:
 6. Wrong format for CIDR blocks
 """
     
+    S3_ACLS = frozenset({
+        'private', 'public-read', 'public-read-write', 'aws-exec-read', 'authenticated-read',
+        'bucket-owner-read', 'bucket-owner-full-control', 'log-delivery-write'
+    })
+    S3_STORAGE_CLASSES = frozenset({
+        'STANDARD', 'REDUCED_REDUNDANCY', 'STANDARD_IA', 'ONEZONE_IA',
+        'INTELLIGENT_TIERING', 'GLACIER', 'DEEP_ARCHIVE', 'GLACIER_IR'
+    })
+    EBS_VOLUME_TYPES = frozenset({'gp2', 'gp3', 'io1', 'io2', 'st1', 'sc1', 'standard'})
+    EC2_TENANCIES = frozenset({'default', 'dedicated', 'host'})
+    RDS_ENGINES = frozenset({
+        'mysql', 'postgres', 'postgresql', 'mariadb', 'oracle-se2', 'sqlserver-ex', 'sqlserver-web'
+    })
+    
+    VALIDATION_CACHE_SIZE = 1024
+    # Per-field fallback validations in flight at once
+    FIELD_WORKERS = 8
+    # AWS_KNOWLEDGE lives in a Gemini context cache for this long, renewed a minute early
+    KNOWLEDGE_CACHE_TTL = 3600
+    
     def __init__(self, gemini_client: genai.Client, model_name: str):
         self.gemini_client = gemini_client
         self.model_name = model_name
-        self.issues: List[ValidationIssue] = []
+        self.field_pool = ThreadPoolExecutor(max_workers=self.FIELD_WORKERS)
+        self.knowledge_cache = SystemInstructionCache(
+            gemini_client, model_name, self.AWS_KNOWLEDGE, ttl=self.KNOWLEDGE_CACHE_TTL
+        )
+        # sha256(variables, resource type) -> parsed validation JSON
+        self._validation_cache: OrderedDict = OrderedDict()
+        self._validation_cache_lock = threading.Lock()
     
     def validate_and_correct(self, variables: Dict, resource_type: str) -> CorrectionResult:
         """Main validation method using LLM"""
-        self.issues = []
+        # Local, not on self: requests validate concurrently on the shared instance
+        issues: List[ValidationIssue] = []
         
-        print("\n" + "="*70)
-        print(" VALIDATING INPUT VARIABLES ")
-        print("="*70)
+        log.debug("Validating input variables")
         
         if not variables:
-            print("\n  No variables to validate.\n")
+            log.debug("No variables to validate")
             return CorrectionResult(
                 corrected_variables={},
                 issues=[],
@@ -126,10 +681,22 @@ class LLMInputValidator:
                 needs_confirmation=[]
             )
         
-        # Use LLM to validate all variables at once
-        validation_result = self._llm_validate_all_variables(variables, resource_type)
+        # Values the AWS_KNOWLEDGE rules settle locally never reach the model
+        remaining = {
+            name: value for name, value in variables.items()
+            if not self._passes_local_rules(name, value)
+        }
+        if len(remaining) < len(variables):
+            log.debug("%d variable(s) passed local rule checks", len(variables) - len(remaining))
+        
+        # Use LLM to validate the rest at once
+        if remaining:
+            validation_result = self._llm_validate_all_variables(remaining, resource_type)
+        else:
+            validation_result = {'corrected_variables': {}, 'fields': {}}
         
-        corrected_variables = validation_result.get('corrected_variables', variables.copy())
+        corrected_variables = variables.copy()
+        corrected_variables.update(validation_result.get('corrected_variables', {}))
         auto_corrected_fields = []
         needs_confirmation = []
         
@@ -150,7 +717,7 @@ class LLMInputValidator:
                     message=issue_message,
                     suggested_correction=str(corrected_value) if corrected_value != original_value else None
                 )
-                self.issues.append(issue)
+                issues.append(issue)
                 
                 # Determine if auto-correct or needs confirmation
                 auto_correct_confidence = field_validation.get('auto_correct_confidence', 0.0)
@@ -160,128 +727,182 @@ class LLMInputValidator:
                     corrected_variables[field_name] = corrected_value
                     
                     if severity == 'error':
-                        print(f"\n CRITICAL ERROR in '{field_name}':")
-                        print(f"   {issue_message}")
-                        print(f"    Auto-corrected: '{original_value}' → '{corrected_value}'\n")
+                        log.debug("Critical error in '%s': %s; auto-corrected '%s' → '%s'",
+                                  field_name, issue_message, original_value, corrected_value)
                     else:
-                        print(f"   Auto-corrected '{field_name}': '{original_value}' → '{corrected_value}'")
+                        log.debug("Auto-corrected '%s': '%s' → '%s'", field_name, original_value, corrected_value)
                 else:
                     needs_confirmation.append(issue)
                     corrected_variables[field_name] = corrected_value
-                    print(f"    '{field_name}': '{original_value}' → '{corrected_value}' (needs confirmation)")
+                    log.debug("'%s': '%s' → '%s' (needs confirmation)", field_name, original_value, corrected_value)
             else:
                 # Value is valid but might be normalized
                 if corrected_value != original_value:
                     auto_corrected_fields.append(field_name)
                     corrected_variables[field_name] = corrected_value
-                    print(f"   Normalized '{field_name}': '{original_value}' → '{corrected_value}'")
-        
-        # Print summary
-        has_critical_errors = any(issue.severity == 'error' for issue in self.issues)
-        
-        print(f"\n{'='*70}")
-        print(f"  Total issues found: {len(self.issues)}")
-        print(f"  Auto-corrected: {len(auto_corrected_fields)}")
-        print(f"  Needs confirmation: {len(needs_confirmation)}")
-        
-        if has_critical_errors:
-            print(f"\n   CRITICAL ERRORS DETECTED!")
-            print(f"  These values WILL cause AWS to fail if not corrected.")
-        
-        print(f"{'='*70}\n")
+                    log.debug("Normalized '%s': '%s' → '%s'", field_name, original_value, corrected_value)
+        
+        if log.isEnabledFor(logging.DEBUG):
+            has_critical_errors = any(issue.severity == 'error' for issue in issues)
+            log.debug(
+                "Validation summary: %d issue(s), %d auto-corrected, %d need confirmation%s",
+                len(issues), len(auto_corrected_fields), len(needs_confirmation),
+                "; critical errors will make AWS fail if not corrected" if has_critical_errors else ""
+            )
         
         return CorrectionResult(
             corrected_variables=corrected_variables,
-            issues=self.issues,
+            issues=issues,
             auto_corrected=auto_corrected_fields,
             needs_confirmation=needs_confirmation
         )
     
+    def _passes_local_rules(self, field_name: str, value) -> bool:
+        """True when a table rule recognises the field and the value is plainly valid.
+
+        Unknown fields and values that fail a rule return False and go to the model,
+        which can suggest a correction.
+        """
+        name = field_name.lower().replace('-', '_').replace(' ', '_')
+        text = str(value).strip()
+        
+        if 'acl' in name:
+            return text in self.S3_ACLS
+        if 'region' in name:
+            return bool(AWS_REGION_PATTERN.match(text))
+        if 'cidr' in name:
+            try:
+                return '/' in text and ipaddress.ip_network(text, strict=False).version == 4
+            except ValueError:
+                return False
+        if 'versioning' in name or name.startswith(('enable', 'is_')) or name.endswith('_enabled'):
+            return isinstance(value, bool) or text in ('true', 'false')
+        if 'storage_class' in name:
+            return text in self.S3_STORAGE_CLASSES
+        if 'volume_type' in name:
+            return text in self.EBS_VOLUME_TYPES
+        if 'tenancy' in name:
+            return text in self.EC2_TENANCIES
+        if 'instance_class' in name:
+            return bool(RDS_INSTANCE_CLASS_PATTERN.match(text))
+        if name == 'engine' or name.endswith('_engine'):
+            return text in self.RDS_ENGINES
+        if name in ('bucket', 'bucket_name'):
+            return bool(S3_BUCKET_NAME_PATTERN.match(text)) and '..' not in text
+        return False
+    
     def _llm_validate_all_variables(self, variables: Dict, resource_type: str) -> Dict:
         """Use LLM to validate all variables intelligently"""
-        print("\n   Running AI validation...\n")
-        
-        variables_str = json.dumps(variables, indent=2)
-        
-        prompt = f"""You are an AWS Terraform expert validator. Analyze these user-provided variables for a {resource_type} resource.
-
-USER VARIABLES:
-{variables_str}
-
-VALIDATION RULES:
-{self.AWS_KNOWLEDGE}
-
-TASKS:
-1. Validate EACH variable against AWS requirements
-2. Identify invalid values that will cause AWS to FAIL
-3. Provide corrected values with high accuracy
-4. Assign severity: 'error' (will cause AWS failure), 'warning' (suboptimal), 'info' (style)
-5. Rate your confidence in auto-correction (0.0-1.0)
-
-CRITICAL FOCUS AREAS:
-- S3 ACL values: "yes", "no", "true", "false" are INVALID → suggest valid ACL
-- Boolean values: Convert yes/no/enabled/disabled to true/false
-- AWS regions: Check format and spelling
-- Instance types: Verify they exist
-- Naming conventions: Ensure AWS compliance
-
-Respond ONLY with JSON (no markdown, no preamble):
-{{ino
-  "corrected_variables": {{
-    "field_name": "corrected_value"
-  }},
-  "fields": {{
-    "field_name": {{
-      "is_valid": true/false,
-      "original_value": "value",
-      "corrected_value": "corrected_value",
-      "issue_type": "invalid_acl|invalid_region|invalid_boolean|naming_issue|etc",
-      "severity": "error|warning|info",
-      "message": "Clear explanation of what's wrong and why it will fail",
-      "auto_correct_confidence": 0.0-1.0,
-      "reasoning": "Why this correction was made"
-    }}
-  }},
-  "overall_assessment": "Brief summary"
-}}
-"""
-        
+        # Identical variables for the same resource type get the same verdict
+        cache_key = hashlib.sha256(
+            json.dumps([variables, resource_type], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._validation_cache_lock:
+            cached = self._validation_cache.get(cache_key)
+            if cached is not None:
+                self._validation_cache.move_to_end(cache_key)
+                log.debug("Reusing cached AI validation")
+                # Callers mutate the corrected variables, so hand out a private copy
+                return copy.deepcopy(cached)
+        
+        log.debug("Running AI validation")
+        
+        complete = True
+        error = None
         try:
-            response = self.gemini_client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
-            
-            # Extract JSON from response
-            response_text = response.text.strip()
-            response_text = re.sub(r'^```json\s*', '', response_text)
-            response_text = re.sub(r'^```\s*', '', response_text)
-            response_text = re.sub(r'\s*```$', '', response_text)
-            
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                
-                print(f"   AI validation complete")
-                if 'overall_assessment' in result:
-                    print(f"  Assessment: {result['overall_assessment']}\n")
-                
-                return result
-            else:
-                print(f"    Could not parse AI response, using original values")
-                return {
-                    'corrected_variables': variables.copy(),
-                    'fields': {},
-                    'overall_assessment': 'Validation skipped'
-                }
-        
+            result = self._request_validation(variables, resource_type)
         except Exception as e:
-            print(f"    AI validation error: {str(e)}")
+            log.debug("AI validation error: %s", e)
+            result, error = None, e
+        
+        # A malformed batch answer shouldn't cost every field its validation
+        if (result is None or 'fields' not in result) and len(variables) > 1:
+            log.debug("Batch validation unusable, validating fields individually")
+            result, complete = self._validate_fields_individually(variables, resource_type)
+        
+        if result is None and error is not None:
+            return {
+                'corrected_variables': variables.copy(),
+                'fields': {},
+                'overall_assessment': f'Validation error: {str(error)}'
+            }
+        if result is None:
+            log.debug("Could not parse AI response, using original values")
             return {
                 'corrected_variables': variables.copy(),
                 'fields': {},
-                'overall_assessment': f'Validation error: {str(e)}'
+                'overall_assessment': 'Validation skipped'
             }
+        
+        log.debug("AI validation complete: %s", result.get('overall_assessment', ''))
+        
+        if complete:
+            with self._validation_cache_lock:
+                self._validation_cache[cache_key] = copy.deepcopy(result)
+                while len(self._validation_cache) > self.VALIDATION_CACHE_SIZE:
+                    self._validation_cache.popitem(last=False)
+        return result
+    
+    def _validate_fields_individually(self, variables: Dict, resource_type: str) -> Tuple[Optional[Dict], bool]:
+        """Validate each variable on its own, in parallel, and merge the answers.
+
+        Returns the merged result (None if no field could be validated) and
+        whether every field got an answer.
+        """
+        def validate_one(item):
+            field_name, value = item
+            try:
+                result = self._request_validation({field_name: value}, resource_type)
+            except Exception as e:
+                log.debug("AI validation error for '%s': %s", field_name, e)
+                return None
+            if not result or field_name not in result.get('fields', {}):
+                return None
+            return result
+        
+        merged = {'corrected_variables': variables.copy(), 'fields': {}}
+        futures = [submit_in_context(self.field_pool, validate_one, item) for item in variables.items()]
+        for (field_name, value), future in zip(variables.items(), futures):
+            result = future.result()
+            if result is None:
+                continue
+            merged['fields'][field_name] = result['fields'][field_name]
+            merged['corrected_variables'][field_name] = result.get('corrected_variables', {}).get(field_name, value)
+        
+        if not merged['fields']:
+            return None, False
+        merged['overall_assessment'] = f"Validated {len(merged['fields'])}/{len(variables)} fields individually"
+        return merged, len(merged['fields']) == len(variables)
+    
+    def _request_validation(self, variables: Dict, resource_type: str) -> Optional[Dict]:
+        """Ask Gemini to validate the given variables; None if the answer holds no JSON"""
+        variables_str = to_json(variables, indent=2).decode()
+        
+        knowledge_cache = self.knowledge_cache.name()
+        if knowledge_cache:
+            rules_text = "(provided in the system instructions)"
+            config = types.GenerateContentConfig(cached_content=knowledge_cache)
+        else:
+            rules_text = self.AWS_KNOWLEDGE
+            config = None
+        
+        prompt = VALIDATION_PROMPT_TEMPLATE.format(
+            resource_type=resource_type, variables=variables_str, rules=rules_text
+        )
+        
+        try:
+            response_text = stream_json_response(self.gemini_client, self.model_name, prompt, config)
+        except Exception:
+            if knowledge_cache:
+                self.knowledge_cache.invalidate()
+            raise
+        
+        # Extract JSON from response
+        response_text = response_text.strip()
+        response_text = JSON_FENCE_START_PATTERN.sub('', response_text)
+        response_text = JSON_FENCE_END_PATTERN.sub('', response_text)
+        
+        return parse_json_body(response_text)
     
     def get_confirmation_from_user(self, needs_confirmation: List[ValidationIssue]) -> Dict:
         """Interactively confirm corrections with user"""
@@ -363,89 +984,209 @@ Respond ONLY with JSON (no markdown, no preamble):
         print("\n" + "="*70)
 
 
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+# Dynamically quantised int8 export shipped with the model, tuned for VNNI dot products
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# Queries and prompts are short; longer inputs are truncated rather than padded out
+EMBEDDING_MAX_SEQ_LENGTH = 256
+
+
+@lru_cache(maxsize=1)
+def load_embedding_model() -> SentenceTransformer:
+    """Load the embedding model once per process, on ONNX Runtime with a PyTorch fallback"""
+    try:
+        model = SentenceTransformer(
+            EMBEDDING_MODEL, backend="onnx",
+            model_kwargs={"file_name": EMBEDDING_ONNX_FILE},
+        )
+    except Exception as e:
+        log.warning("ONNX embedding backend unavailable (%s), using PyTorch", e)
+        model = SentenceTransformer(EMBEDDING_MODEL)
+    model.max_seq_length = EMBEDDING_MAX_SEQ_LENGTH
+    return model
+
+
 class PineconeIndex():
-    """Pinecone Index class for vector store operations."""
+    """Pinecone Index class for vector store operations.
+
+    Query embeddings are unit-normalised at encode time, so the index should be
+    created with metric='dotproduct': it ranks exactly like cosine without the
+    per-query norm. Documents must be upserted with normalize_embeddings=True too.
+    """
+    EMBEDDING_CACHE_SIZE = 4096
+    QUERY_CACHE_SIZE = 1024
+    # Query results go stale once new documents are ingested, so they only live this long
+    QUERY_CACHE_TTL = 600
+    POOL_THREADS = 16
+    ENCODE_BATCH_SIZE = 32
+
     def __init__(self, PINECONE_API_KEY, PINECONE_ENVIRONMENT, index_name):
         self.pinecone = Pinecone(api_key=PINECONE_API_KEY, environment=PINECONE_ENVIRONMENT)
-        self.index = self.pinecone.Index(index_name)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-    def retrieve_index(self, prompt, top_k=5, namespace="__default__"):
-        """Retrieve top_k similar items from the index"""
-        query_vector = self.embedding_model.encode([prompt]).tolist()[0]
+        # Sized for the concurrent retrieval threads of several in-flight requests
+        self.index = self.pinecone.Index(index_name, pool_threads=self.POOL_THREADS)
+        self.embedding_model = load_embedding_model()
+        # text -> embedding; repeated texts (retries, the fixed structural/code queries) skip the model
+        self._embedding_cache: OrderedDict = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        # (vector bytes, top_k, namespace) -> (expires_at, results)
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+    def warm_up(self):
+        """Open the Pinecone connection and load the model weights before the first request"""
+        self.index.describe_index_stats()
+        self.embedding_model.encode(["warm up"], normalize_embeddings=True)
+
+    def embed(self, text):
+        """Embed a single text with the index's embedding model"""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List:
+        """Embed several texts, encoding every uncached one in a single batched forward pass"""
+        with self._embedding_cache_lock:
+            cached = {text: self._embedding_cache.get(text) for text in texts}
+            missing = list(dict.fromkeys(text for text, vector in cached.items() if vector is None))
+
+        if missing:
+            vectors = self.embedding_model.encode(
+                missing, batch_size=self.ENCODE_BATCH_SIZE, convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+            with self._embedding_cache_lock:
+                for text, vector in zip(missing, vectors):
+                    cached[text] = vector
+                    self._embedding_cache[text] = vector
+                while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+
+        with self._embedding_cache_lock:
+            for text in texts:
+                if text in self._embedding_cache:
+                    self._embedding_cache.move_to_end(text)
+        return [cached[text] for text in texts]
+
+    def retrieve_index(self, prompt, top_k=5, namespace="__default__", query_embedding=None):
+        """Retrieve top_k similar items from the index, reusing query_embedding when given"""
+        if query_embedding is None:
+            query_embedding = self.embed(prompt)
+
+        # Identical vectors give identical matches, so repeats skip the Pinecone round-trip
+        cache_key = (query_embedding.tobytes(), top_k, namespace)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached and cached[0] > time.monotonic():
+                self._query_cache.move_to_end(cache_key)
+                return cached[1]
+
+        # The SDK only serialises plain lists, so convert once per uncached query
+        query_vector = query_embedding.tolist()
         results = self.index.query(
             vector=query_vector, 
             top_k=top_k, 
             include_metadata=True,
         )
-        print("Retrived Documents:",results)
+        log.debug("Retrieved documents: %s", results)
+
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = (time.monotonic() + self.QUERY_CACHE_TTL, results)
+            self._query_cache.move_to_end(cache_key)
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
         return results
 
 
 class MultiStrategyRetrieval():
     """Layer 3: Multi-Strategy Retrieval System"""
+    # Three strategies per request, several requests in flight
+    SEARCH_WORKERS = 12
+
     def __init__(self, pinecone_index: PineconeIndex, gemini_client: genai.Client, model_name: str):
         self.pinecone_index = pinecone_index
         self.gemini_client = gemini_client
         self.model_name = model_name
+        self.search_pool = ThreadPoolExecutor(max_workers=self.SEARCH_WORKERS)
         
-    def semantic_search(self, query: str, top_k: int = 5) -> List[RetrievalResult]:
+    def semantic_search(self, query: str, top_k: int = 5, query_embedding=None) -> List[RetrievalResult]:
         """Semantic search using vector embeddings"""
-        print("   Performing semantic search...")
-        results = self.pinecone_index.retrieve_index(query, top_k=top_k)
+        log.debug("Performing semantic search")
+        results = self.pinecone_index.retrieve_index(query, top_k=top_k, query_embedding=query_embedding)
         
         retrieval_results = []
         for match in results.get('matches', []):
+            metadata = match.get('metadata', {})
             retrieval_results.append(RetrievalResult(
-                content=match.get('metadata', {}).get('text', ''),
+                content=metadata.get('text', ''),
                 score=match.get('score', 0.0),
-                metadata=match.get('metadata', {}),
+                metadata=metadata,
                 strategy=SearchStrategy.SEMANTIC
             ))
         return retrieval_results
     
-    def structural_search(self, resource_type: str, top_k: int = 3) -> List[RetrievalResult]:
+    def structural_search(self, resource_type: str, top_k: int = 3, query_embedding=None) -> List[RetrievalResult]:
         """Search for structural templates and module patterns"""
-        print("    Performing structural search...")
-        query = f"terraform module structure {resource_type} best practices"
-        results = self.pinecone_index.retrieve_index(query, top_k=top_k, namespace="__default__")
+        log.debug("Performing structural search")
+        query = self.structural_query(resource_type)
+        results = self.pinecone_index.retrieve_index(
+            query, top_k=top_k, namespace="__default__", query_embedding=query_embedding
+        )
         
         retrieval_results = []
         for match in results.get('matches', []):
+            metadata = match.get('metadata', {})
             retrieval_results.append(RetrievalResult(
-                content=match.get('metadata', {}).get('text', ''),
+                content=metadata.get('text', ''),
                 score=match.get('score', 0.0),
-                metadata=match.get('metadata', {}),
+                metadata=metadata,
                 strategy=SearchStrategy.STRUCTURAL
             ))
         return retrieval_results
     
-    def code_search(self, query: str, top_k: int = 3) -> List[RetrievalResult]:
+    def code_search(self, query: str, top_k: int = 3, query_embedding=None) -> List[RetrievalResult]:
         """Search for similar code implementations"""
-        print("   Performing code search...")
-        code_query = f"terraform code implementation {query}"
-        results = self.pinecone_index.retrieve_index(code_query, top_k=top_k, namespace="__default__")
+        log.debug("Performing code search")
+        code_query = self.code_query(query)
+        results = self.pinecone_index.retrieve_index(
+            code_query, top_k=top_k, namespace="__default__", query_embedding=query_embedding
+        )
         
         retrieval_results = []
         for match in results.get('matches', []):
+            metadata = match.get('metadata', {})
             retrieval_results.append(RetrievalResult(
-                content=match.get('metadata', {}).get('text', ''),
+                content=metadata.get('text', ''),
                 score=match.get('score', 0.0),
-                metadata=match.get('metadata', {}),
+                metadata=metadata,
                 strategy=SearchStrategy.CODE
             ))
         return retrieval_results
     
-    def multi_strategy_retrieve(self, query: str, resource_type: str) -> List[RetrievalResult]:
-        """Combine all search strategies"""
-        print("\n LAYER 3: Multi-Strategy Retrieval\n")
-        
-        semantic_results = self.semantic_search(query, top_k=5)
-        structural_results = self.structural_search(resource_type, top_k=3)
-        code_results = self.code_search(query, top_k=3)
-        
-        all_results = semantic_results + structural_results + code_results
-        print(f"   Retrieved {len(all_results)} total results\n")
+    @staticmethod
+    def structural_query(resource_type: str) -> str:
+        return f"terraform module structure {resource_type} best practices"
+    
+    @staticmethod
+    def code_query(query: str) -> str:
+        return f"terraform code implementation {query}"
+    
+    def multi_strategy_retrieve(self, query: str, resource_type: str, query_embedding=None) -> List[RetrievalResult]:
+        """Combine all search strategies; query_embedding skips re-embedding the raw query"""
+        log.debug("Layer 3: multi-strategy retrieval")
+        
+        # All query texts go through the embedding model in one batch
+        texts = [self.structural_query(resource_type), self.code_query(query)]
+        if query_embedding is None:
+            texts.append(query)
+        embeddings = self.pinecone_index.embed_many(texts)
+        if query_embedding is None:
+            query_embedding = embeddings[2]
+        
+        # The three Pinecone queries are independent, so they overlap instead of stacking
+        semantic = submit_in_context(self.search_pool, self.semantic_search, query, top_k=5, query_embedding=query_embedding)
+        structural = submit_in_context(self.search_pool, self.structural_search, resource_type, top_k=3, query_embedding=embeddings[0])
+        code = submit_in_context(self.search_pool, self.code_search, query, top_k=3, query_embedding=embeddings[1])
+        
+        all_results = semantic.result() + structural.result() + code.result()
+        log.debug("Retrieved %d total results", len(all_results))
         
         return all_results
 
@@ -458,53 +1199,48 @@ class IntelligentReranker():
     
     def relevance_scoring(self, query: str, results: List[RetrievalResult]) -> List[RetrievalResult]:
         """Score results based on relevance to the query"""
-        print("   Scoring relevance...")
+        log.debug("Scoring relevance")
         
         prompt = f"""Rate the relevance of each document to this query: "{query}"
         
 Documents:
 {self._format_results_for_scoring(results)}
 
-Respond with JSON array of scores (0-1) for each document:
-{{"scores": [0.9, 0.7, ...]}}
-"""
-        
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
+Respond with JSON array of scores (0-1) for each document:
+{{"scores": [0.9, 0.7, ...]}}
+"""
         
-        try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                scores_data = json.loads(json_match.group())
-                scores = scores_data.get('scores', [])
-                
-                for i, result in enumerate(results):
-                    if i < len(scores):
-                        result.score = (result.score + scores[i]) / 2
-        except:
-            pass
+        scores_data = generate_json(self.gemini_client, self.model_name, prompt, RelevanceScores)
+        if scores_data:
+            for result, score in zip(results, scores_data.scores):
+                result.score = (result.score + score) / 2
         
-        return sorted(results, key=lambda x: x.score, reverse=True)
+        # Ordering happens once, in select_best_context
+        return results
     
     def security_validation(self, results: List[RetrievalResult]) -> List[RetrievalResult]:
         """Validate security aspects of retrieved content"""
-        print("   Validating security...")
+        log.debug("Validating security")
+        
+        bits = SECURITY_KEYWORD_BITS
+        secrets = bits['hardcoded'] | bits['password']
+        public_bucket = bits['public'] | bits['bucket']
+        encryption = bits['encryption'] | bits['kms']
+        access_control = bits['iam'] | bits['policy']
         
         validated_results = []
         for result in results:
-            content_lower = result.content.lower()
+            found = self._security_keyword_mask(result.content.lower())
             security_score = 1.0
             
-            if 'hardcoded' in content_lower or 'password' in content_lower:
+            if found & secrets:
                 security_score -= 0.3
-            if 'public' in content_lower and 'bucket' in content_lower:
+            if found & public_bucket == public_bucket:
                 security_score -= 0.2
             
-            if 'encryption' in content_lower or 'kms' in content_lower:
+            if found & encryption:
                 security_score += 0.1
-            if 'iam' in content_lower or 'policy' in content_lower:
+            if found & access_control:
                 security_score += 0.1
             
             result.score = result.score * security_score
@@ -512,18 +1248,32 @@ Respond with JSON array of scores (0-1) for each document:
         
         return validated_results
     
+    @staticmethod
+    def _security_keyword_mask(content_lower: str) -> int:
+        """Bitmask of the SECURITY_KEYWORDS present, from a single pass over the text"""
+        found = 0
+        if SECURITY_KEYWORD_AUTOMATON is None:
+            for keyword, keyword_bit in SECURITY_KEYWORD_BITS.items():
+                if keyword in content_lower:
+                    found |= keyword_bit
+            return found
+        for _, keyword_bit in SECURITY_KEYWORD_AUTOMATON.iter(content_lower):
+            found |= keyword_bit
+        return found
+    
     def select_best_context(self, results: List[RetrievalResult], max_context: int = 5) -> List[RetrievalResult]:
         """Select the best context from re-ranked results"""
-        print("    Selecting best context...")
+        log.debug("Selecting best context")
         
-        selected = results[:max_context]
-        print(f"   Selected {len(selected)} best results\n")
+        # Only the top few are kept, so a bounded heap beats sorting every result
+        selected = heapq.nlargest(max_context, results, key=lambda x: x.score)
+        log.debug("Selected %d best results", len(selected))
         
         return selected
     
     def rerank_and_validate(self, query: str, results: List[RetrievalResult]) -> List[RetrievalResult]:
         """Complete re-ranking and validation pipeline"""
-        print("\n LAYER 4: Intelligent Re-ranking & Validation\n")
+        log.debug("Layer 4: re-ranking and validation")
         
         results = self.relevance_scoring(query, results)
         results = self.security_validation(results)
@@ -544,6 +1294,10 @@ class VariableTracker():
     def __init__(self):
         self.variables = {}
         self.variable_usage_map = {}
+        self._values = set()
+        self._automaton = None
+        # (code, used, unused) of the last check; repeated checks of the same code skip the scan
+        self._last_check = None
     
     def add_variables(self, variables: Dict):
         """Add variables to track"""
@@ -554,28 +1308,74 @@ class VariableTracker():
                 'used': False,
                 'locations': []
             }
+        self._build_automaton()
+    
+    def _build_automaton(self):
+        """Compile the tracked values once; every later usage check reuses the automaton"""
+        self._values = {str(var_info['value']) for var_info in self.variable_usage_map.values()}
+        self._automaton = None
+        self._last_check = None
+        
+        # The automaton can't hold an empty pattern, which trivially matches everywhere
+        if ahocorasick is None or not self._values or '' in self._values:
+            return
+        
+        automaton = ahocorasick.Automaton()
+        for value in self._values:
+            automaton.add_word(value, value)
+        automaton.make_automaton()
+        self._automaton = automaton
     
     def check_usage_in_code(self, code: str) -> Tuple[List[str], List[str]]:
         """Check which variables are used/unused in code"""
+        if self._last_check is not None and self._last_check[0] == code:
+            return list(self._last_check[1]), list(self._last_check[2])
+        
         used = []
         unused = []
         
+        value_lines = self._find_value_lines(code)
+        
         for var_name, var_info in self.variable_usage_map.items():
-            var_value = str(var_info['value'])
+            lines = value_lines.get(str(var_info['value']))
             
-            if var_value in code:
+            if lines is not None:
                 used.append(var_name)
                 self.variable_usage_map[var_name]['used'] = True
-                lines = code.split('\n')
-                for i, line in enumerate(lines, 1):
-                    if var_value in line:
-                        self.variable_usage_map[var_name]['locations'].append(i)
+                self.variable_usage_map[var_name]['locations'] = list(lines)
             else:
                 unused.append(var_name)
                 self.variable_usage_map[var_name]['used'] = False
+                self.variable_usage_map[var_name]['locations'] = []
         
+        self._last_check = (code, tuple(used), tuple(unused))
         return used, unused
     
+    def _find_value_lines(self, code: str) -> Dict[str, List[int]]:
+        """Map every tracked value that occurs in code to the line numbers containing it"""
+        if not self._values:
+            return {}
+        
+        if self._automaton is None:
+            lines = code.split('\n')
+            return {
+                value: [i for i, line in enumerate(lines, 1) if value in line]
+                for value in self._values if value in code
+            }
+        
+        # One Aho-Corasick pass finds every value, however many variables there are
+        line_starts = [0] + [match.end() for match in NEWLINE_PATTERN.finditer(code)]
+        value_lines = {}
+        for end, value in self._automaton.iter(code):
+            lines = value_lines.setdefault(value, [])
+            if '\n' in value:
+                # A value spanning lines is used but, as before, lies on no single line
+                continue
+            line = bisect_right(line_starts, end - len(value) + 1)
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return value_lines
+    
     def get_usage_report(self) -> str:
         """Generate a detailed usage report"""
         report = []
@@ -592,15 +1392,26 @@ class VariableTracker():
 
 class MultiAgentGeneration():
     """Layer 5: Multi-Agent Generation System"""
+    
+    # Top-level string arguments a missing value may be written into without asking
+    # the model, per resource type; any other value goes through the fix pass
+    INJECTABLE_ARGUMENTS = {
+        'aws_s3_bucket': frozenset({'bucket', 'bucket_prefix'}),
+        'aws_instance': frozenset({'ami', 'instance_type', 'availability_zone', 'key_name', 'subnet_id', 'tenancy'}),
+        'aws_ebs_volume': frozenset({'availability_zone', 'type', 'kms_key_id'}),
+        'aws_db_instance': frozenset({'identifier', 'engine', 'engine_version', 'instance_class', 'db_name', 'username'}),
+        'aws_vpc': frozenset({'cidr_block', 'instance_tenancy'}),
+        'aws_subnet': frozenset({'vpc_id', 'cidr_block', 'availability_zone'}),
+    }
+    
     def __init__(self, gemini_client: genai.Client, model_name: str):
         self.gemini_client = gemini_client
         self.model_name = model_name
-        self.variable_tracker = VariableTracker()
+        self.review_instructions = SystemInstructionCache(gemini_client, model_name, REVIEW_INSTRUCTIONS)
     
     def extract_terraform_code(self, response_text: str) -> str:
         """Extract clean Terraform code from response"""
-        code = re.sub(r'```(?:hcl|terraform|tf)?\n?', '', response_text)
-        code = re.sub(r'```\n?$', '', code)
+        code = strip_code_fences(response_text)
         
         lines = code.split('\n')
         clean_lines = []
@@ -608,13 +1419,13 @@ class MultiAgentGeneration():
         
         for line in lines:
             stripped = line.strip()
-            if any(keyword in stripped for keyword in ['resource', 'variable', 'output', 'data', 'locals', 'terraform', 'provider']):
+            if TERRAFORM_KEYWORD_PATTERN.search(stripped):
                 in_terraform_block = True
             
             if in_terraform_block:
                 if stripped.startswith('#') or stripped.startswith('//'):
                     clean_lines.append(line)
-                elif stripped and not any(word in stripped.lower() for word in ['here is', 'this code', 'explanation:', 'note:', 'this will', 'the above', 'this terraform']):
+                elif stripped and not EXPLANATION_PATTERN.search(stripped):
                     clean_lines.append(line)
                 elif not stripped:
                     clean_lines.append(line)
@@ -634,261 +1445,210 @@ class MultiAgentGeneration():
         
         return '\n'.join(instructions)
     
+    def inject_missing_variables(self, code: str, missing: Dict) -> Optional[str]:
+        """Write missing values into the resource blocks whose arguments they name.
+
+        A value is only injected when its name is a known argument of a resource
+        type present in the code (INJECTABLE_ARGUMENTS); it goes into the first
+        block of that type. Returns None otherwise, or when the edit can't be
+        applied safely, so the caller falls back to asking the model.
+        """
+        blocks = {}
+        for block in RESOURCE_BLOCK_PATTERN.finditer(code):
+            blocks.setdefault(block.group(1), f'{block.group(1)}.{block.group(2)}')
+        
+        edits = []
+        for var_name, value in missing.items():
+            tf_arg = var_name.lower().replace(' ', '_').replace('-', '_')
+            address = next((
+                address for resource_type, address in blocks.items()
+                if tf_arg in self.INJECTABLE_ARGUMENTS.get(resource_type, ())
+            ), None)
+            if address is None:
+                return None
+            edits.append(ResourceEdit(resource_block=address, attribute=tf_arg, value=str(value)))
+        
+        return apply_resource_edits(code, edits)
+    
     def generator_agent(self, query: str, context: List[RetrievalResult], 
-                       variables: Dict, max_attempts: int = 3) -> str:
-        """Main generator agent with multi-attempt variable enforcement"""
-        print("   Generator Agent: Creating Terraform code...")
+                       variables: Dict, variable_tracker: VariableTracker, max_attempts: int = 3,
+                       on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Main generator agent with multi-attempt variable enforcement
+
+        When on_token is given, the first attempt is streamed and each text chunk
+        is passed to it as soon as Gemini produces it.
+        """
+        log.debug("Generator agent: creating Terraform code")
         
-        self.variable_tracker.add_variables(variables)
+        variable_tracker.add_variables(variables)
         
         context_text = self._format_context(context)
         variable_instructions = self.create_variable_injection_prompt(variables)
+        # Every attempt sends the same prompt, so it is built once
+        prompt = GENERATOR_PROMPT_TEMPLATE.format(
+            query=query, variable_instructions=variable_instructions, context_text=context_text
+        )
         
         for attempt in range(max_attempts):
             if attempt > 0:
-                print(f"   Attempt {attempt + 1}/{max_attempts} - Ensuring all variables are used...")
-            
-            prompt = f"""You are a Terraform code generator. Generate ONLY valid Terraform HCL code.
-
-User Request: {query}
-
-{variable_instructions}
-
-Reference Documentation (use as guidance for structure):
-{context_text}
-
-CRITICAL RULES - FAILURE TO FOLLOW WILL REQUIRE REGENERATION:
-1. EVERY user-provided value MUST appear EXACTLY as given in the code
-2. DO NOT use placeholder values like "example", "my-bucket", "test" - use the EXACT values provided
-3. Return ONLY Terraform code - NO explanations, NO markdown blocks
-4. Use proper Terraform HCL syntax with correct indentation (2 spaces)
-5. All strings must be properly quoted
-6. All brackets must be balanced and closed
-7. Include brief inline comments (using #) only for complex logic
-
-Generate the complete Terraform code now:
-"""
+                log.debug("Attempt %d/%d - ensuring all variables are used", attempt + 1, max_attempts)
             
-            response = self.gemini_client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
+            if on_token is not None and attempt == 0:
+                chunks = []
+                for chunk in self.gemini_client.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=prompt
+                ):
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        on_token(chunk.text)
+                response_text = ''.join(chunks)
+            else:
+                response = self.gemini_client.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt
+                )
+                response_text = response.text
             
-            terraform_code = self.extract_terraform_code(response.text)
+            terraform_code = self.extract_terraform_code(response_text)
             
-            used_vars, unused_vars = self.variable_tracker.check_usage_in_code(terraform_code)
+            used_vars, unused_vars = variable_tracker.check_usage_in_code(terraform_code)
             
             if not unused_vars:
-                print(f"   All {len(used_vars)} variables successfully incorporated")
+                log.debug("All %d variables successfully incorporated", len(used_vars))
                 return terraform_code
             
+            log.debug("Missing %d variable(s): %s", len(unused_vars), ', '.join(unused_vars))
+            
+            # Plain argument insertions don't need another model round-trip
+            injected_code = self.inject_missing_variables(
+                terraform_code, {var: variables[var] for var in unused_vars}
+            )
+            if injected_code is not None:
+                log.debug("Injected %d missing variable(s) into their resource blocks", len(unused_vars))
+                return injected_code
+            
             if attempt < max_attempts - 1:
-                print(f"    Missing {len(unused_vars)} variable(s): {', '.join(unused_vars)}")
                 
                 unused_details = '\n'.join([f"  • {var} = \"{variables[var]}\"" for var in unused_vars])
                 
-                fix_prompt = f"""The following Terraform code is INCOMPLETE. It is MISSING required user values.
-
-INCOMPLETE CODE:
-{terraform_code}
-
-MISSING VALUES THAT MUST BE ADDED:
-{unused_details}
-
-INSTRUCTIONS:
-1. Identify where each missing value should be used in the Terraform resource
-2. Add the EXACT values (not placeholders) to the appropriate resource arguments
-3. Keep all existing code structure
-4. Return ONLY the complete corrected Terraform code
-5. NO explanations, NO markdown
-
-Corrected complete code:
-"""
+                fix_prompt = FIX_PROMPT_TEMPLATE.format(
+                    terraform_code=terraform_code, unused_details=unused_details
+                )
                 
                 fix_response = self.gemini_client.models.generate_content(
                     model=self.model_name,
                     contents=fix_prompt
                 )
                 terraform_code = self.extract_terraform_code(fix_response.text)
+                
+                used_vars, unused_vars = variable_tracker.check_usage_in_code(terraform_code)
+                if not unused_vars:
+                    log.debug("All %d variables added by the fix pass", len(used_vars))
+                    return terraform_code
         
-        used_vars, unused_vars = self.variable_tracker.check_usage_in_code(terraform_code)
+        used_vars, unused_vars = variable_tracker.check_usage_in_code(terraform_code)
         if unused_vars:
-            print(f"    WARNING: {len(unused_vars)} variable(s) still missing after {max_attempts} attempts")
+            log.warning("%d variable(s) still missing after %d attempts", len(unused_vars), max_attempts)
         
         return terraform_code
     
-    def validator_agent(self, terraform_code: str, variables: Dict) -> ValidationResult:
-        """Validator agent with comprehensive variable checking"""
-        print("   Validator Agent: Checking correctness...")
+    def review_agents(self, terraform_code: str, variables: Dict,
+                      variable_tracker: VariableTracker) -> Tuple[Dict[str, ValidationResult], List[ResourceEdit]]:
+        """Validator, security and cost optimizer agents answered by one batched Gemini call.
+
+        Besides the three verdicts the reviewer decides whether anything must be
+        fixed and returns those fixes as edits (empty when the status is ok).
+        """
+        log.debug("Review agents: checking correctness, security and costs")
         
-        used_vars, unused_vars = self.variable_tracker.check_usage_in_code(terraform_code)
+        used_vars, unused_vars = variable_tracker.check_usage_in_code(terraform_code)
         
         issues = []
         if unused_vars:
             for var in unused_vars:
                 issues.append(f"CRITICAL: User value '{var} = {variables[var]}' is NOT present in code")
         
-        prompt = f"""Review this Terraform code for correctness and completeness:
-
-{terraform_code}
-
-User-Provided Values That MUST Be Present:
-{json.dumps(variables, indent=2)}
-
-Already Identified Issues:
-{json.dumps(issues, indent=2) if issues else "None"}
-
-Perform additional checks for:
-1. Terraform syntax errors
-2. Missing required resource arguments
-3. Proper resource naming conventions
-4. Valid Terraform structure
-5. Correct indentation and formatting
-
-Respond in JSON format:
-{{
-    "is_valid": true/false,
-    "issues": ["list of all issues including missing user values"],
-    "suggestions": ["improvements"],
-    "score": 0.0-1.0
-}}
-"""
-        
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
-        
-        try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                result_data = json.loads(json_match.group())
-                all_issues = issues + result_data.get('issues', [])
-                
-                return ValidationResult(
-                    is_valid=result_data.get('is_valid', True) and len(unused_vars) == 0,
-                    issues=all_issues,
-                    suggestions=result_data.get('suggestions', []),
-                    score=0.3 if unused_vars else result_data.get('score', 0.8)
-                )
-        except:
-            pass
-        
-        return ValidationResult(
-            is_valid=len(unused_vars) == 0,
-            issues=issues,
-            suggestions=[],
-            score=0.3 if unused_vars else 0.8
-        )
-    
-    def security_agent(self, terraform_code: str) -> ValidationResult:
-        """Security agent - identifies security issues"""
-        print("   Security Agent: Analyzing security...")
-        
-        prompt = f"""Analyze this Terraform code for security issues:
-
-{terraform_code}
-
-Check for:
-1. Hardcoded secrets or credentials
-2. Public access configurations
-3. Missing encryption settings
-4. IAM policy issues
-5. Network security concerns
-
-Respond in JSON format:
-{{
-    "is_valid": true/false,
-    "issues": ["list of security issues"],
-    "suggestions": ["list of security improvements"],
-    "score": 0.0-1.0
-}}
-"""
-        
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
+        # The code is sent once and each reviewer answers under its own key
+        prompt = REVIEW_PROMPT_TEMPLATE.format(
+            terraform_code=terraform_code,
+            variables=to_json(variables, indent=2).decode(),
+            issues=to_json(issues, indent=2).decode() if issues else "None"
         )
         
         try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                result_data = json.loads(json_match.group())
-                return ValidationResult(
-                    is_valid=result_data.get('is_valid', True),
-                    issues=result_data.get('issues', []),
-                    suggestions=result_data.get('suggestions', []),
-                    score=result_data.get('score', 0.8)
-                )
-        except:
-            pass
-        
-        return ValidationResult(is_valid=True, issues=[], suggestions=[], score=0.8)
+            reviews = generate_json(
+                self.gemini_client, self.model_name, prompt, ReviewBatch, self.review_instructions.config()
+            ) or ReviewBatch()
+        except Exception as e:
+            log.debug("Review request failed: %s", e)
+            self.review_instructions.invalidate()
+            reviews = ReviewBatch()
+        
+        validator_data = reviews.validator
+        results = {
+            'validator': ValidationResult(
+                is_valid=validator_data.is_valid and len(unused_vars) == 0,
+                issues=issues + validator_data.issues,
+                suggestions=validator_data.suggestions,
+                score=0.3 if unused_vars else validator_data.score
+            )
+        }
+        for agent in ('security', 'cost_optimizer'):
+            agent_data = getattr(reviews, agent)
+            results[agent] = ValidationResult(
+                is_valid=agent_data.is_valid,
+                issues=agent_data.issues,
+                suggestions=agent_data.suggestions,
+                score=agent_data.score
+            )
+        return results, reviews.edits if reviews.status == "needs_fix" else []
     
-    def cost_optimizer_agent(self, terraform_code: str) -> ValidationResult:
-        """Cost optimizer agent - suggests cost optimizations"""
-        print("   Cost Optimizer Agent: Analyzing costs...")
-        
-        prompt = f"""Analyze this Terraform code for cost optimization:
-
-{terraform_code}
-
-Check for:
-1. Over-provisioned resources
-2. Missing cost-saving features
-3. Unnecessary data transfer costs
-4. Storage optimization opportunities
-
-Respond in JSON format:
-{{
-    "is_valid": true/false,
-    "issues": ["list of cost issues"],
-    "suggestions": ["list of cost optimizations"],
-    "score": 0.0-1.0
-}}
-"""
-        
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
-        
-        try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                result_data = json.loads(json_match.group())
-                return ValidationResult(
-                    is_valid=result_data.get('is_valid', True),
-                    issues=result_data.get('issues', []),
-                    suggestions=result_data.get('suggestions', []),
-                    score=result_data.get('score', 0.8)
-                )
-        except:
-            pass
-        
-        return ValidationResult(is_valid=True, issues=[], suggestions=[], score=0.8)
+    def apply_review_edits(self, terraform_code: str, edits: List[ResourceEdit],
+                           variable_tracker: VariableTracker) -> str:
+        """Apply the reviewer's edits one by one, skipping any that can't be applied
+        safely or that would remove a user value already in the code"""
+        used_before = set(variable_tracker.check_usage_in_code(terraform_code)[0])
+        applied = 0
+        for edit in edits:
+            patched = apply_resource_edits(terraform_code, [edit])
+            if patched is None or not used_before <= set(variable_tracker.check_usage_in_code(patched)[0]):
+                log.debug("Skipping review edit %s.%s", edit.resource_block, edit.attribute)
+                continue
+            terraform_code = patched
+            applied += 1
+        log.debug("Applied %d/%d review edit(s)", applied, len(edits))
+        return terraform_code
     
     def generate_with_agents(self, query: str, context: List[RetrievalResult], 
-                            variables: Dict) -> Tuple[str, Dict[str, ValidationResult], VariableTracker]:
+                            variables: Dict,
+                            on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict[str, ValidationResult], VariableTracker]:
         """Orchestrate all agents and return tracker"""
-        print("\n LAYER 5: Multi-Agent Generation\n")
+        log.debug("Layer 5: multi-agent generation")
         
-        terraform_code = self.generator_agent(query, context, variables, max_attempts=3)
+        # One tracker per call, so concurrent requests never see each other's variables
+        variable_tracker = VariableTracker()
         
-        validation_results = {
-            'validator': self.validator_agent(terraform_code, variables),
-            'security': self.security_agent(terraform_code),
-            'cost_optimizer': self.cost_optimizer_agent(terraform_code)
-        }
+        # The reference documents go inline. Regeneration is rare because missing
+        # variables are usually injected directly, so a per-request context cache
+        # would cost an extra create and delete without being read again.
+        terraform_code = self.generator_agent(
+            query, context, variables, variable_tracker, max_attempts=3, on_token=on_token
+        )
         
-        return terraform_code, validation_results, self.variable_tracker
+        validation_results, edits = self.review_agents(terraform_code, variables, variable_tracker)
+        if edits:
+            # Simple fixes are applied here, without another model call
+            terraform_code = self.apply_review_edits(terraform_code, edits, variable_tracker)
+        
+        return terraform_code, validation_results, variable_tracker
     
     def _format_context(self, context: List[RetrievalResult]) -> str:
         """Format context for generation"""
-        formatted = []
-        for i, result in enumerate(context):
-            formatted.append(f"=== Reference {i+1} (Score: {result.score:.2f}) ===\n{result.content}\n")
-        return "\n".join(formatted)
+        return "\n".join(
+            f"=== Reference {i+1} (Score: {result.score:.2f}) ===\n{result.content}\n"
+            for i, result in enumerate(context)
+        )
 
 
 class ReflectionQA():
@@ -896,86 +1656,12 @@ class ReflectionQA():
     def __init__(self, gemini_client: genai.Client, model_name: str):
         self.gemini_client = gemini_client
         self.model_name = model_name
+        self.refine_instructions = SystemInstructionCache(gemini_client, model_name, REFINEMENT_INSTRUCTIONS)
     
-    def self_critique(self, terraform_code: str, validation_results: Dict[str, ValidationResult], 
-                     variables: Dict, variable_tracker: VariableTracker) -> Dict:
-        """Perform self-critique with variable usage analysis"""
-        print("   Performing self-critique...")
-        
-        all_issues = []
-        all_suggestions = []
-        
-        for agent_name, result in validation_results.items():
-            all_issues.extend(result.issues)
-            all_suggestions.extend(result.suggestions)
-        
-        unused_vars = variable_tracker.get_unused_variables()
-        
-        prompt = f"""Critically review this Terraform code for quality and completeness:
-
-{terraform_code}
-
-User-Provided Values (ALL MUST be present in code):
-{json.dumps(variables, indent=2)}
-
-Variable Usage Status:
-{variable_tracker.get_usage_report()}
-
-Known Issues:
-{json.dumps(all_issues, indent=2)}
-
-Provide comprehensive critique in JSON format:
-{{
-    "overall_quality": 0.0-1.0,
-    "strengths": ["list of strengths"],
-    "weaknesses": ["list of weaknesses"],
-    "must_fix": ["CRITICAL issues that must be fixed"],
-    "improvements": ["suggested improvements"],
-    "all_variables_used": true/false
-}}
-"""
-        
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
-        
-        try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                critique = json.loads(json_match.group())
-                
-                if unused_vars:
-                    critique['all_variables_used'] = False
-                    for var_name, var_value in unused_vars.items():
-                        critique['must_fix'] = critique.get('must_fix', []) + [
-                            f"CRITICAL: Add user value {var_name} = '{var_value}' to the code"
-                        ]
-                else:
-                    critique['all_variables_used'] = True
-                
-                return critique
-        except:
-            pass
-        
-        has_unused = len(unused_vars) > 0
-        return {
-            "overall_quality": 0.4 if has_unused else 0.8,
-            "strengths": [],
-            "weaknesses": [f"Missing variable: {k}" for k in unused_vars.keys()],
-            "must_fix": [f"Add {k} = '{v}'" for k, v in unused_vars.items()],
-            "improvements": [],
-            "all_variables_used": not has_unused
-        }
-    
-    def iterative_refinement(self, terraform_code: str, critique: Dict, 
-                            context: List[RetrievalResult], variables: Dict, 
+    def iterative_refinement(self, terraform_code: str, context: List[RetrievalResult], variables: Dict, 
                             variable_tracker: VariableTracker) -> str:
         """Refine code with laser focus on missing variables"""
-        print("   Performing iterative refinement...")
-        
-        if critique.get('all_variables_used', False) and not critique.get('must_fix'):
-            return terraform_code
+        log.debug("Performing iterative refinement")
         
         unused_vars = variable_tracker.get_unused_variables()
         
@@ -988,31 +1674,32 @@ Provide comprehensive critique in JSON format:
                 f"• {var_name}: \"{var_value}\" - Find the appropriate Terraform argument and set it to this EXACT value"
             )
         
-        prompt = f"""CRITICAL FIX REQUIRED: The following Terraform code is MISSING required user values.
-
-INCOMPLETE CODE:
-{terraform_code}
-
-MISSING VALUES (MUST ADD ALL OF THESE):
-{chr(10).join(missing_var_instructions)}
-
-INSTRUCTIONS:
-1. Identify which Terraform resource arguments need these values
-2. Add the EXACT values (not placeholders) to the code
-3. Maintain all existing code structure and other values
-4. Return ONLY the corrected Terraform code
-5. NO explanations, NO markdown
-
-Corrected code with ALL user values:
-"""
+        prompt = REFINEMENT_PROMPT_TEMPLATE.format(
+            terraform_code=terraform_code, missing_values="\n".join(missing_var_instructions)
+        )
         
+        # Only the edits come back, so output size no longer grows with the file
+        try:
+            answer = generate_json(
+                self.gemini_client, self.model_name, prompt, RefinementEdits, self.refine_instructions.config()
+            )
+        except Exception:
+            self.refine_instructions.invalidate()
+            raise
+        
+        refined_code = apply_resource_edits(terraform_code, answer.edits) if answer else None
+        if refined_code is not None:
+            log.debug("Applied %d refinement edit(s) locally", len(answer.edits))
+            return refined_code
+        
+        # Edits that can't be applied safely (nested blocks, unknown resources) fall back to a rewrite
+        log.debug("Refinement edits unusable, asking for the corrected file")
+        unused_details = "\n".join(f"  • {var_name} = \"{var_value}\"" for var_name, var_value in unused_vars.items())
         response = self.gemini_client.models.generate_content(
             model=self.model_name,
-            contents=prompt
+            contents=FIX_PROMPT_TEMPLATE.format(terraform_code=terraform_code, unused_details=unused_details)
         )
-        
-        refined_code = re.sub(r'```(?:hcl|terraform|tf)?\n?', '', response.text)
-        refined_code = re.sub(r'```\n?', '', refined_code).strip()
+        refined_code = strip_code_fences(response.text).strip()
         
         return refined_code
     
@@ -1021,65 +1708,108 @@ Corrected code with ALL user values:
                                variable_tracker: VariableTracker,
                                max_iterations: int = 4) -> str:
         """Complete reflection and QA pipeline"""
-        print("\n✨ LAYER 6: Reflection & Quality Assurance\n")
+        log.debug("Layer 6: reflection and quality assurance")
         
         current_code = terraform_code
         
+        # Track exactly these variables once; unchanged code is then answered from the
+        # tracker's memo instead of rebuilding the automaton and rescanning every iteration
+        variable_tracker.variable_usage_map = {}
+        variable_tracker.add_variables(variables)
+        
         for iteration in range(max_iterations):
-            print(f"   Iteration {iteration + 1}/{max_iterations}")
+            log.debug("Iteration %d/%d", iteration + 1, max_iterations)
             
-            variable_tracker.variable_usage_map = {}
-            variable_tracker.add_variables(variables)
             used_vars, unused_vars = variable_tracker.check_usage_in_code(current_code)
             
-            critique = self.self_critique(current_code, validation_results, variables, variable_tracker)
-            
-            print(f"    Variables used: {len(used_vars)}/{len(variables)}")
-            if unused_vars:
-                print(f"    Missing: {', '.join(unused_vars)}")
-            
-            if (critique.get('all_variables_used', False) and 
-                critique.get('overall_quality', 0) >= 0.85 and
-                not critique.get('must_fix')):
-                print(f"   ✓ All variables incorporated (quality: {critique.get('overall_quality')})")
+            log.debug("Variables used: %d/%d", len(used_vars), len(variables))
+            if not unused_vars:
+                # The batched reviewer already judged this code and its simple fixes were applied
+                # during generation; refinement only adds missing values, so nothing is left to do
+                log.debug("All variables incorporated")
                 break
             
-            if unused_vars or critique.get('must_fix'):
-                current_code = self.iterative_refinement(
-                    current_code, critique, context, variables, variable_tracker
-                )
+            log.debug("Missing: %s", ', '.join(unused_vars))
+            # The refinement prompt only needs the missing values, so no critique is requested first
+            refined_code = self.iterative_refinement(current_code, context, variables, variable_tracker)
+            if refined_code == current_code:
+                # The next pass would send the identical prompt, so it won't do better
+                log.debug("No progress from refinement, stopping early")
+                break
+            current_code = refined_code
         
-        variable_tracker.variable_usage_map = {}
-        variable_tracker.add_variables(variables)
         used_vars, unused_vars = variable_tracker.check_usage_in_code(current_code)
         
         if unused_vars:
-            print(f"    WARNING: {len(unused_vars)} variable(s) still missing")
+            log.warning("%d variable(s) still missing after reflection", len(unused_vars))
         else:
-            print(f"    SUCCESS: All {len(variables)} variables incorporated")
+            log.debug("All %d variables incorporated", len(variables))
         
-        print(f"   Reflection complete\n")
+        log.debug("Reflection complete")
         
         return current_code
 
 
 class RAGSystem():
     """Complete RAG System with AI-powered input validation"""
-    def __init__(self, pinecone_index: PineconeIndex, gemini_client: genai.Client, model_name: str = "gemini-2.5-flash"):
+    
+    # Query understanding answers kept per normalized query
+    QUERY_CACHE_SIZE = 128
+    
+    def __init__(self, pinecone_index: PineconeIndex, gemini_client: genai.Client, model_name: str = "gemini-2.5-flash",
+                 quiet: bool = False):
         self.model_name = model_name
         self.pinecone_index = pinecone_index 
         self.gemini_client = gemini_client
+        # Batch callers set quiet: this instance's progress below WARNING is dropped
+        # and nothing is printed; other instances keep their output
+        self.quiet = quiet
         
         self.retrieval = MultiStrategyRetrieval(pinecone_index, gemini_client, model_name)
         self.reranker = IntelligentReranker(gemini_client, model_name)
         self.agents = MultiAgentGeneration(gemini_client, model_name)
         self.reflection = ReflectionQA(gemini_client, model_name)
         self.validator = LLMInputValidator(gemini_client, model_name)
+        # Retrieval and re-ranking run here while the CLI waits on the user's input
+        self.context_pool = ThreadPoolExecutor(max_workers=2)
+        # sha256(whitespace-normalized query) -> parsed requirements
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+    @contextmanager
+    def _quiet_scope(self):
+        """Mark the work done inside as quiet when this instance is"""
+        if not self.quiet:
+            yield
+            return
+        token = QUIET_RUN.set(True)
+        try:
+            yield
+        finally:
+            QUIET_RUN.reset(token)
+    
+    def embed(self, text: str):
+        """Embed text once so callers can share the vector across retrieval and caching"""
+        return self.pinecone_index.embed(text)
+
+    def retrieve_context(self, user_query: str, resource_type: str) -> List[RetrievalResult]:
+        """Layers 3 & 4: multi-strategy retrieval followed by re-ranking"""
+        retrieval_results = self.retrieval.multi_strategy_retrieve(user_query, resource_type)
+        return self.reranker.rerank_and_validate(user_query, retrieval_results)
 
     def query_understanding_agent(self, user_query: str) -> Dict:
         """Layer 1: Query Understanding with value extraction"""
-        print("\n LAYER 1: Query Understanding\n")
-        print("  Analyzing your request...\n")
+        log.debug("Layer 1: query understanding")
+        
+        # Case is kept: the extracted values must match the query exactly
+        cache_key = hashlib.sha256(' '.join(user_query.split()).encode()).hexdigest()
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+                log.debug("Reusing cached query understanding")
+                # The answer is returned to arbitrary callers, so hand out a private copy
+                return copy.deepcopy(cached)
         
         prompt = f"""Analyze this Terraform infrastructure request and extract ALL specific details:
 
@@ -1100,76 +1830,75 @@ Respond in JSON format:
     "optional_configs": ["list", "of", "optional", "settings"]
 }}
 """
-        response = self.gemini_client.models.generate_content(
-            model=self.model_name,
-            contents=prompt
-        )
-        
-        try:
-            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-            if json_match:
-                requirements = json.loads(json_match.group())
-                print(f"   Resource type: {requirements.get('resource_type')}")
-                print(f"   Values extracted: {len(requirements.get('user_provided_values', {}))}")
-                
-                if requirements.get('user_provided_values'):
-                    print("\n   Extracted from your query:")
-                    for key, value in requirements.get('user_provided_values', {}).items():
-                        print(f"    • {key}: {value}")
-                
-                print(f"   Additional info needed: {len(requirements.get('required_variables', []))}\n")
-                return requirements
-        except Exception as e:
-            print(f"    Error parsing response: {e}")
-        
-        return {
-            "resource_type": "infrastructure",
-            "user_provided_values": {},
-            "required_variables": [],
-            "optional_configs": []
-        }
+        parsed = generate_json(self.gemini_client, self.model_name, prompt, QueryRequirements)
+        if parsed is None:
+            log.warning("Query understanding answer unusable, continuing without extracted values")
+            return QueryRequirements().model_dump()
+        
+        requirements = parsed.model_dump()
+        log.debug("Resource type: %s", requirements['resource_type'])
+        log.debug("Values extracted: %d", len(requirements['user_provided_values']))
+        
+        if requirements['user_provided_values']:
+            log.debug("Extracted from your query:")
+            for key, value in requirements['user_provided_values'].items():
+                log.debug("  • %s: %s", key, value)
+        
+        log.debug("Additional info needed: %d", len(requirements['required_variables']))
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = copy.deepcopy(requirements)
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return requirements
     
-    def collect_user_variables(self, requirements: Dict) -> Dict:
-        """Layer 2: Variable Collection & validation"""
-        print("LAYER 2: Collecting Required Information\n")
+    def collect_user_variables(self, requirements: Dict, prefilled: Optional[Dict] = None) -> Dict:
+        """Layer 2: Variable Collection & validation
+
+        Values in prefilled are used as given and nothing is asked interactively,
+        which lets scripts and batch runs drive the pipeline.
+        """
+        with self._quiet_scope():
+            return self._collect_user_variables(requirements, prefilled)
+    
+    def _collect_user_variables(self, requirements: Dict, prefilled: Optional[Dict]) -> Dict:
+        quiet = self.quiet
+        if not quiet:
+            print("LAYER 2: Collecting Required Information\n")
         
         user_variables = requirements.get('user_provided_values', {}).copy()
+        interactive = prefilled is None
+        if prefilled:
+            user_variables.update(prefilled)
         
-        if not user_variables and not requirements.get('required_variables'):
+        if not quiet and not user_variables and not requirements.get('required_variables'):
             print("    No specific values provided. Please provide details for better results.\n")
         
-        # Ask for additional required variables
-        required_vars = requirements.get('required_variables', [])
-        if required_vars:
-            print("Please provide the following required information:\n")
+        required_vars = [var for var in requirements.get('required_variables', []) if var not in user_variables]
+        optional_configs = [config for config in requirements.get('optional_configs', []) if config not in user_variables]
+        
+        if interactive and (required_vars or optional_configs):
+            # Everything is asked for in one form; only required fields left blank are asked again
+            user_variables.update(self._read_bulk_values(required_vars, optional_configs))
             for var in required_vars:
-                while True:
+                while var not in user_variables:
                     value = input(f"  {var}: ").strip()
                     if value:
                         user_variables[var] = value
-                        break
                     else:
                         print(f"      This field is required. Please provide a value.")
         
-        # Ask for optional configurations
-        optional_configs = requirements.get('optional_configs', [])
-        if optional_configs:
-            print("\n Optional configurations (press Enter to skip):\n")
-            for config in optional_configs:
-                value = input(f"  {config} [optional]: ").strip()
-                if value:
-                    user_variables[config] = value
-        
         if not user_variables:
-            print("\n    WARNING: No specific values provided!")
-            print("  The generated code will be generic and may not meet your needs.\n")
+            if not quiet:
+                print("\n    WARNING: No specific values provided!")
+                print("  The generated code will be generic and may not meet your needs.\n")
             return user_variables
         
-        print(f"\n   Total variables collected: {len(user_variables)}")
-        print("\n  Your configuration:")
-        for key, value in user_variables.items():
-            print(f"    • {key}: {value}")
-        print()
+        if not quiet:
+            print(f"\n   Total variables collected: {len(user_variables)}")
+            print("\n  Your configuration:")
+            for key, value in user_variables.items():
+                print(f"    • {key}: {value}")
+            print()
         
         # === AI-POWERED VALIDATION ===
         correction_result = self.validator.validate_and_correct(
@@ -1178,10 +1907,11 @@ Respond in JSON format:
         )
         
         # Print detailed validation report
-        self.validator.print_validation_report(correction_result)
+        if not quiet:
+            self.validator.print_validation_report(correction_result)
         
         # Get user confirmation for uncertain corrections
-        if correction_result.needs_confirmation:
+        if interactive and correction_result.needs_confirmation:
             confirmations = self.validator.get_confirmation_from_user(
                 correction_result.needs_confirmation
             )
@@ -1190,37 +1920,68 @@ Respond in JSON format:
         # Use AI-corrected variables
         user_variables = correction_result.corrected_variables
         
-        print("\n   Variables after AI validation:")
-        for key, value in user_variables.items():
-            print(f"    • {key}: {value}")
-        print()
+        if not quiet:
+            print("\n   Variables after AI validation:")
+            for key, value in user_variables.items():
+                print(f"    • {key}: {value}")
+            print()
         
         return user_variables
     
-    def generate_terraform_code(self, user_query: str) -> Dict:
-        """Complete pipeline from query to final code"""
-        print("\n" + "="*70)
-        print(" TERRAFORM IaC GENERATION PIPELINE")
-        print("="*70)
+    @staticmethod
+    def _read_bulk_values(required_vars: List[str], optional_configs: List[str]) -> Dict:
+        """Show every field at once and read key=value (or number=value) lines until a blank line"""
+        fields = required_vars + optional_configs
+        print("Please provide the following information, one key=value per line")
+        print("(* = required, blank line to finish):\n")
+        for number, field in enumerate(fields, 1):
+            marker = "*" if field in required_vars else " "
+            print(f"  {number:>2}. {marker} {field}")
+        print()
+        
+        values = {}
+        while True:
+            try:
+                line = input("  > ").strip()
+            except EOFError:
+                break
+            if not line:
+                break
+            key, sep, value = line.partition('=')
+            key, value = key.strip(), value.strip()
+            if key.isdigit() and 1 <= int(key) <= len(fields):
+                key = fields[int(key) - 1]
+            if not sep or key not in fields:
+                print(f"      Unrecognised entry '{line}', expected key=value")
+                continue
+            if value:
+                values[key] = value
+        return values
+    
+    def generate_terraform_code(self, user_query: str, prefilled: Optional[Dict] = None) -> Dict:
+        """Complete pipeline from query to final code; prefilled values skip the prompts"""
+        with self._quiet_scope():
+            return self._generate_terraform_code(user_query, prefilled)
+    
+    def _generate_terraform_code(self, user_query: str, prefilled: Optional[Dict]) -> Dict:
+        log.debug("Terraform IaC generation pipeline")
         
         # Layer 1: Query Understanding
         requirements = self.query_understanding_agent(user_query)
         
+        # Layers 3 & 4 only need the query and resource type, so they start now
+        # and overlap with the (possibly interactive) variable collection
+        context_future = submit_in_context(
+            self.context_pool, self.retrieve_context, user_query, requirements['resource_type']
+        )
+        
         # Layer 2: Variable Collection with AI Validation
-        variables = self.collect_user_variables(requirements)
+        variables = self.collect_user_variables(requirements, prefilled)
         
         if not variables:
-            print("\n  Proceeding with generic code generation...")
-            print("  Consider re-running with specific values for better results.\n")
+            log.debug("No specific values provided, proceeding with generic code generation")
         
-        # Layer 3: Multi-Strategy Retrieval
-        retrieval_results = self.retrieval.multi_strategy_retrieve(
-            user_query, 
-            requirements['resource_type']
-        )
-        
-        # Layer 4: Re-ranking & Validation
-        best_context = self.reranker.rerank_and_validate(user_query, retrieval_results)
+        best_context = context_future.result()
         
         # Layer 5: Multi-Agent Generation
         terraform_code, validation_results, variable_tracker = self.agents.generate_with_agents(
@@ -1239,13 +2000,11 @@ Respond in JSON format:
             max_iterations=4
         )
         
-        # Final verification
-        final_tracker = VariableTracker()
-        final_tracker.add_variables(variables)
-        used_vars, unused_vars = final_tracker.check_usage_in_code(final_code)
+        # Final verification; reflection left the tracker on exactly these variables and this code
+        used_vars, unused_vars = variable_tracker.check_usage_in_code(final_code)
         
-        # Print results
-        self._print_results(final_code, validation_results, best_context, variables, final_tracker)
+        if not self.quiet:
+            print(self._format_results(final_code, validation_results, best_context, variables, variable_tracker))
         
         return {
             'terraform_code': final_code,
@@ -1253,74 +2012,81 @@ Respond in JSON format:
             'requirements': requirements,
             'variables': variables,
             'retrieved_context': best_context,
-            'variable_tracker': final_tracker,
+            'variable_tracker': variable_tracker,
             'used_variables': used_vars,
             'unused_variables': unused_vars
         }
     
-    def _print_results(self, terraform_code: str, 
-                       validation_results: Dict[str, ValidationResult],
-                       context: List[RetrievalResult],
-                       variables: Dict,
-                       variable_tracker: VariableTracker):
-        """Print final results"""
-        print("\n" + "="*70)
-        print(" GENERATED TERRAFORM CODE")
-        print("="*70)
-        print(terraform_code)
-        
-        print("\n" + "="*70)
-        print(" VARIABLE USAGE VERIFICATION")
-        print("="*70)
+    def _format_results(self, terraform_code: str, 
+                        validation_results: Dict[str, ValidationResult],
+                        context: List[RetrievalResult],
+                        variables: Dict,
+                        variable_tracker: VariableTracker) -> str:
+        """Render the final results report"""
+        lines = []
+        lines.append("\n" + "="*70)
+        lines.append(" GENERATED TERRAFORM CODE")
+        lines.append("="*70)
+        lines.append(terraform_code)
+        
+        lines.append("\n" + "="*70)
+        lines.append(" VARIABLE USAGE VERIFICATION")
+        lines.append("="*70)
         
         if variables:
-            print(f"\nTotal variables provided: {len(variables)}")
-            print("\nDetailed usage analysis:\n")
-            print(variable_tracker.get_usage_report())
+            lines.append(f"\nTotal variables provided: {len(variables)}")
+            lines.append("\nDetailed usage analysis:\n")
+            lines.append(variable_tracker.get_usage_report())
             
             unused = variable_tracker.get_unused_variables()
             if unused:
-                print(f"\n   CRITICAL WARNING: {len(unused)} variable(s) NOT used in code!")
-                print("\nMissing variables:")
+                lines.append(f"\n   CRITICAL WARNING: {len(unused)} variable(s) NOT used in code!")
+                lines.append("\nMissing variables:")
                 for var_name, var_value in unused.items():
-                    print(f"  ✗ {var_name} = '{var_value}'")
-                print("\n  Please manually add these values to the generated code.")
+                    lines.append(f"  ✗ {var_name} = '{var_value}'")
+                lines.append("\n  Please manually add these values to the generated code.")
             else:
-                print(f"\n  SUCCESS: All {len(variables)} variables properly incorporated!")
+                lines.append(f"\n  SUCCESS: All {len(variables)} variables properly incorporated!")
         else:
-            print("\n  No variables were provided - code is generic")
+            lines.append("\n  No variables were provided - code is generic")
         
-        print("\n" + "="*70)
-        print(" VALIDATION SUMMARY")
-        print("="*70)
+        lines.append("\n" + "="*70)
+        lines.append(" VALIDATION SUMMARY")
+        lines.append("="*70)
         
         for agent_name, result in validation_results.items():
-            print(f"\n{agent_name.upper()}:")
-            print(f"  Valid: {'✓ Yes' if result.is_valid else '✗ No'}")
-            print(f"  Score: {result.score:.2f}")
+            lines.append(f"\n{agent_name.upper()}:")
+            lines.append(f"  Valid: {'✓ Yes' if result.is_valid else '✗ No'}")
+            lines.append(f"  Score: {result.score:.2f}")
             if result.issues:
-                print(f"  Issues ({len(result.issues)}):")
+                lines.append(f"  Issues ({len(result.issues)}):")
                 for issue in result.issues[:3]:
-                    print(f"    • {issue}")
+                    lines.append(f"    • {issue}")
             if result.suggestions:
-                print(f"  Suggestions ({len(result.suggestions)}):")
+                lines.append(f"  Suggestions ({len(result.suggestions)}):")
                 for suggestion in result.suggestions[:2]:
-                    print(f"    • {suggestion}")
+                    lines.append(f"    • {suggestion}")
         
-        print("\n" + "="*70)
-        print(" RETRIEVED CONTEXT USED")
-        print("="*70)
-        print(f"   Used {len(context)} reference documents")
+        lines.append("\n" + "="*70)
+        lines.append(" RETRIEVED CONTEXT USED")
+        lines.append("="*70)
+        lines.append(f"   Used {len(context)} reference documents")
         for i, ctx in enumerate(context[:3]):
-            print(f"  {i+1}. {ctx.strategy.value.upper()} (Score: {ctx.score:.2f})")
+            lines.append(f"  {i+1}. {ctx.strategy.value.upper()} (Score: {ctx.score:.2f})")
         
-        print("\n" + "="*70)
-        print(" PIPELINE COMPLETE")
-        print("="*70)
+        lines.append("\n" + "="*70)
+        lines.append(" PIPELINE COMPLETE")
+        lines.append("="*70)
+        
+        return "\n".join(lines)
 
 
 def main():
     """Main execution function"""
+    # The CLI shows the pipeline's progress that the server keeps at DEBUG
+    logging.basicConfig(format="   %(message)s")
+    log.setLevel(logging.DEBUG)
+    
     print("🔧 Initializing Terraform IaC RAG System with AI Validation...\n")
     
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
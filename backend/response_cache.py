@@ -0,0 +1,190 @@
+"""
+Two-tier response cache for the RAG endpoints
+Exact hits on a normalized key first, then nearest-neighbour hits on the query embedding
+Optionally backed by SQLite so entries survive restarts
+"""
+
+import re
+import time
+import json
+import pickle
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+log = logging.getLogger("autoterra.cache")
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so trivial edits share a key"""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', query.lower())).strip()
+
+
+def collapse_whitespace(query: str) -> str:
+    """Collapse whitespace only, for entries that depend on the query's exact spelling"""
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def make_scope(*parts: Any) -> str:
+    """Stable string for the non-query inputs an entry depends on"""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class ResponseCache:
+    """TTL + LRU cache with a cosine-similarity fallback over cached query embeddings"""
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.95,
+        db_path: Optional[str] = None,
+        name: str = "default",
+        normalizer: Callable[[str], str] = normalize_query
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.name = name
+        self.normalizer = normalizer
+        # key -> (expires_at, scope, normalized embedding or None, value)
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[np.ndarray], Any]]" = OrderedDict()
+        # scope -> (keys, stacked embeddings), rebuilt lazily after any change
+        self._matrices: Dict[str, Tuple[list, np.ndarray]] = {}
+        # Handlers call in from the event loop and from worker threads
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        # SQLite writes go through one background thread so a busy database never
+        # blocks the caller
+        self._writer: Optional[ThreadPoolExecutor] = None
+        if db_path:
+            self._open(db_path)
+
+    def get(self, query: str, scope: str = "", embedding: Optional[np.ndarray] = None) -> Optional[Any]:
+        """Return a cached value for an exact or semantically equivalent query, or None"""
+        with self._lock:
+            return self._get(query, scope, embedding)
+
+    def _get(self, query: str, scope: str, embedding: Optional[np.ndarray]) -> Optional[Any]:
+        self._expire()
+
+        key = self._key(query, scope)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[3]
+
+        if embedding is None:
+            return None
+
+        keys, matrix = self._matrix(scope)
+        if not keys:
+            return None
+
+        # One matmul scores the query against every cached embedding in this scope
+        similarities = matrix @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        self._entries.move_to_end(keys[best])
+        return self._entries[keys[best]][3]
+
+    def put(self, query: str, value: Any, scope: str = "", embedding: Optional[np.ndarray] = None):
+        """Store a value under the normalized query and scope
+
+        The in-memory entry is set at once; the SQLite copy is written in the
+        background, and a failed write is only logged.
+        """
+        key = self._key(query, scope)
+        normalized = self._normalize(embedding) if embedding is not None else None
+
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, scope, normalized, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._matrices.clear()
+
+        if self._writer is not None:
+            self._writer.submit(self._persist, key, expires_at, scope, normalized, value)
+
+    def _persist(self, key: str, expires_at: float, scope: str, normalized: Optional[np.ndarray], value: Any):
+        """Write one entry to SQLite; runs on the writer thread"""
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (self.name, key, expires_at, scope, pickle.dumps((normalized, value)))
+            )
+            self._db.commit()
+        except Exception as e:
+            # The entry is still served from memory; only its persistence is lost
+            log.warning("Could not persist %s cache entry: %s", self.name, e)
+            try:
+                self._db.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _open(self, db_path: str):
+        """Attach the SQLite store and load its unexpired entries, newest last"""
+        self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        # WAL lets every worker read while another one writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "cache TEXT, key TEXT, expires_at REAL, scope TEXT, payload BLOB, "
+            "PRIMARY KEY (cache, key))"
+        )
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+
+        rows = self._db.execute(
+            "SELECT key, expires_at, scope, payload FROM entries WHERE cache = ? "
+            "ORDER BY expires_at DESC LIMIT ?",
+            (self.name, self.maxsize)
+        ).fetchall()
+        for key, expires_at, scope, payload in reversed(rows):
+            try:
+                normalized, value = pickle.loads(payload)
+            except Exception:
+                # Entries pickled against older model classes are simply dropped
+                continue
+            self._entries[key] = (expires_at, scope, normalized, value)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-cache-writer")
+
+    def _key(self, query: str, scope: str) -> str:
+        return f"{scope}\x00{self.normalizer(query)}"
+
+    def _expire(self):
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrices.clear()
+
+    def _matrix(self, scope: str) -> Tuple[list, np.ndarray]:
+        if scope not in self._matrices:
+            keys = [
+                key for key, entry in self._entries.items()
+                if entry[1] == scope and entry[2] is not None
+            ]
+            matrix = np.stack([self._entries[key][2] for key in keys]) if keys else np.empty((0, 0))
+            self._matrices[scope] = (keys, matrix)
+        return self._matrices[scope]
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
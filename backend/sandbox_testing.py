@@ -4,18 +4,131 @@ Validates and tests Terraform code in isolated environments
 """
 
 import os
-import subprocess
+import asyncio
+import atexit
+import hashlib
+import queue
 import tempfile
 import shutil
-import json
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
+import ijson
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime
-from pathlib import Path
 
+# json is only needed as parse_json's fallback
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+    import json
 
-@dataclass
+
+# Providers are downloaded once and shared by every sandbox; ~/.terraform.d is the
+# directory docker-compose persists in the terraform-cache volume
+PLUGIN_CACHE_DIR = os.getenv("TF_PLUGIN_CACHE_DIR", os.path.expanduser("~/.terraform.d/plugin-cache"))
+
+# Compiled once at import and shared by every TerraformSandboxTester; one
+# alternation so resources and providers come out of a single pass
+BLOCK_HEADER_PATTERN = re.compile(
+    r'(?P<resource>resource\s+"(?P<resource_type>[^"]+)"\s+"(?P<resource_name>[^"]+)")'
+    r'|(?P<provider>provider\s+"(?P<provider_name>[^"]+)")'
+)
+HEREDOC_PATTERN = re.compile(r'<<-?([A-Za-z_][\w-]*)\s*$')
+ASSIGNMENT_PATTERN = re.compile(r'[A-Za-z_][\w-]*( *)=(?![=>])( *)')
+
+
+def _scan_hcl_line(line: str, in_comment: bool) -> Tuple[int, bool, Optional[str]]:
+    """Net bracket change of one HCL line, skipping strings and comments
+
+    Returns the change, whether a block comment is still open at the end of
+    the line, and the marker of a heredoc the line opens.
+    """
+    net = 0
+    i = 0
+    n = len(line)
+    while i < n:
+        if in_comment:
+            end = line.find('*/', i)
+            if end < 0:
+                return net, True, None
+            in_comment = False
+            i = end + 2
+            continue
+        c = line[i]
+        if c == '"':
+            i += 1
+            while i < n and line[i] != '"':
+                i += 2 if line[i] == '\\' else 1
+        elif c == '#' or line.startswith('//', i):
+            break
+        elif line.startswith('/*', i):
+            in_comment = True
+            i += 1
+        elif line.startswith('<<', i):
+            match = HEREDOC_PATTERN.match(line, i)
+            if match:
+                return net, False, match.group(1)
+        elif c in '{[(':
+            net += 1
+        elif c in '}])':
+            net -= 1
+        i += 1
+    return net, in_comment, None
+
+
+def is_terraform_formatted(code: str) -> bool:
+    """In-process stand-in for `terraform fmt -check`
+
+    Checks the layout fmt rewrites most often: trailing whitespace, tabs,
+    indentation (fmt's rule of two spaces per line that nets open brackets)
+    and the single space after an attribute's `=`. Alignment and spacing
+    inside expressions aren't checked, nor are heredoc bodies and block
+    comments, so it can pass code fmt would still touch.
+    """
+    indents = []
+    heredoc = None
+    in_comment = False
+    for line in code.split('\n'):
+        if heredoc is not None:
+            if line.strip() == heredoc:
+                heredoc = None
+            continue
+        
+        continued = in_comment
+        net, in_comment, heredoc = _scan_hcl_line(line, in_comment)
+        if continued or not line:
+            continue
+        if line[-1] in ' \t\r':
+            return False
+        
+        # Indent stack as fmt keeps it: a line netting open brackets indents the
+        # following lines one level, and closers pop levels until they're used up
+        expected = 2 * len(indents)
+        if net > 0:
+            indents.append(net)
+        elif net < 0:
+            closed = -net
+            while closed > 0 and indents:
+                if closed >= indents[-1]:
+                    closed -= indents.pop()
+                else:
+                    indents[-1] -= closed
+                    closed = 0
+            expected = 2 * len(indents)
+        
+        content = line.lstrip(' ')
+        if len(line) - len(content) != expected or content[0] == '\t':
+            return False
+        
+        assignment = ASSIGNMENT_PATTERN.match(content)
+        if assignment and (not assignment.group(1) or assignment.group(2) != ' '):
+            return False
+    return True
+
+
+@dataclass(slots=True)
 class ValidationResult:
     """Result of terraform validation"""
     valid: bool
@@ -26,7 +139,7 @@ class ValidationResult:
     warnings: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class SecurityScanResult:
     """Result of security scanning"""
     passed: bool
@@ -38,7 +151,7 @@ class SecurityScanResult:
     scanner: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TestResult:
     """Complete test result"""
     status: str
@@ -53,64 +166,307 @@ class TestResult:
 class TerraformSandboxTester:
     """Tests Terraform code in isolated sandbox"""
     
+    # Released sandboxes kept for reuse, with their initialized providers
+    SANDBOX_POOL_SIZE = 4
+    # Findings kept per scanner; the rest are only counted
+    FINDINGS_LIMIT = 10
+    # Longest validate/plan output kept on a TestResult; the middle of longer output is elided
+    MAX_OUTPUT_CHARS = 64 * 1024
+    # checkov results kept per distinct main.tf
+    CHECKOV_CACHE_SIZE = 256
+    CHECKOV_FINDING_FIELDS = {
+        f'results.failed_checks.item.{field}': field
+        for field in ('check_id', 'check_name', 'file_path', 'resource')
+    }
+    block_pattern = BLOCK_HEADER_PATTERN
+    
     def __init__(self):
-        self.resource_pattern = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"')
-        self.provider_pattern = re.compile(r'provider\s+"([^"]+)"')
+        os.makedirs(PLUGIN_CACHE_DIR, exist_ok=True)
+        self.env = {
+            **os.environ,
+            'TF_PLUGIN_CACHE_DIR': PLUGIN_CACHE_DIR,
+            # Sandboxes have no lock file, and without this Terraform 1.4+ ignores the cache
+            'TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE': 'true',
+            'TF_IN_AUTOMATION': '1',
+            # Skips the version-check request to checkpoint.hashicorp.com on every command
+            'CHECKPOINT_DISABLE': '1',
+        }
+        
+        # Tools are resolved once; absolute paths also spare each exec a PATH search.
+        # A missing terraform keeps its bare name so run_command reports the failure
+        self.terraform_path = shutil.which('terraform') or 'terraform'
+        self.tfsec_path = shutil.which('tfsec')
+        self.checkov_path = shutil.which('checkov')
+        
+        self._pool: queue.Queue = queue.Queue(maxsize=self.SANDBOX_POOL_SIZE)
+        atexit.register(self._drain_pool)
+        
+        # One parser per tester so its internal buffers are reused between documents
+        self._json_parser = simdjson.Parser() if simdjson else None
+        
+        # sha256(main.tf) -> checkov result; checkov is the slowest scan and only
+        # depends on the file, so retries of the same code skip it
+        self._checkov_cache: OrderedDict = OrderedDict()
     
     def create_sandbox(self) -> str:
-        """Create temporary sandbox directory"""
-        sandbox_dir = tempfile.mkdtemp(prefix="terraform_test_")
-        print(f"Created sandbox: {sandbox_dir}")
+        """Take a released sandbox from the pool, or create a temporary directory"""
+        try:
+            sandbox_dir = self._pool.get_nowait()
+            print(f"Reusing sandbox: {sandbox_dir}")
+        except queue.Empty:
+            sandbox_dir = tempfile.mkdtemp(prefix="terraform_test_")
+            print(f"Created sandbox: {sandbox_dir}")
         return sandbox_dir
     
     def cleanup_sandbox(self, sandbox_dir: str):
-        """Clean up sandbox directory"""
+        """Reset the sandbox and return it to the pool, removing it when the pool is full.
+
+        Only .terraform/providers survives, so the next init finds its providers in
+        place; code, state, lock file, modules and backend settings all go.
+        """
+        try:
+            self._reset_sandbox(sandbox_dir)
+            self._pool.put_nowait(sandbox_dir)
+            print(f"Released sandbox: {sandbox_dir}")
+            return
+        except queue.Full:
+            pass
+        except Exception as e:
+            print(f"WARNING: Failed to reset sandbox, removing it: {e}")
+        
         try:
             shutil.rmtree(sandbox_dir)
             print(f"Cleaned up sandbox: {sandbox_dir}")
         except Exception as e:
             print(f"ERROR: Failed to cleanup: {e}")
     
+    @staticmethod
+    def _reset_sandbox(sandbox_dir: str):
+        """Delete everything a test left behind except the initialized providers"""
+        for entry in os.scandir(sandbox_dir):
+            if entry.name == '.terraform' and entry.is_dir(follow_symlinks=False):
+                for child in os.scandir(entry.path):
+                    if child.name == 'providers':
+                        continue
+                    if child.is_dir(follow_symlinks=False):
+                        shutil.rmtree(child.path)
+                    else:
+                        os.unlink(child.path)
+            elif entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    
+    def _drain_pool(self):
+        """Remove pooled sandboxes at interpreter shutdown"""
+        while True:
+            try:
+                shutil.rmtree(self._pool.get_nowait(), ignore_errors=True)
+            except queue.Empty:
+                return
+    
+    def extract_blocks(self, terraform_code: str) -> Tuple[List[str], List[str]]:
+        """Resource addresses and provider names declared in the code, in source order"""
+        resources, providers = {}, {}
+        for match in self.block_pattern.finditer(terraform_code):
+            if match.lastgroup == 'resource':
+                resources[f"{match.group('resource_type')}.{match.group('resource_name')}"] = None
+            else:
+                providers[match.group('provider_name')] = None
+        return list(resources), list(providers)
+    
     def write_terraform_file(self, sandbox_dir: str, content: str):
         """Write Terraform file to sandbox"""
         filepath = os.path.join(sandbox_dir, 'main.tf')
-        with open(filepath, 'w') as f:
-            f.write(content)
-        print(f"Written main.tf to sandbox")
+        # Encoded once and written straight to the fd, bypassing the buffered text layer
+        data = memoryview(content.encode('utf-8'))
+        fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+    
+    def parse_json(self, text: str) -> Any:
+        """Parse a JSON document, with simdjson when available
+
+        simdjson returns lazy proxies that are only valid until the next parse,
+        so callers must pull out what they need straight away.
+        """
+        if self._json_parser is not None:
+            return self._json_parser.parse(text.encode('utf-8'))
+        return json.loads(text)
     
-    def run_command(self, sandbox_dir: str, command: List[str], timeout: int = 60) -> Tuple[int, str, str]:
-        """Run command in sandbox"""
+    async def run_command(self, sandbox_dir: str, command: List[str], timeout: int = 60,
+                          capture_stdout: bool = True, capture_stderr: bool = True) -> Tuple[int, str, str]:
+        """Run command in sandbox without blocking the event loop
+
+        Streams that aren't captured go to /dev/null and come back as "", so
+        output the caller ignores is never buffered or decoded.
+        """
         try:
-            result = subprocess.run(
-                command,
+            # Plain exec arguments only (no preexec_fn, user/group or umask changes) so
+            # CPython starts the child with vfork rather than copying this process with fork
+            process = await asyncio.create_subprocess_exec(
+                *command,
                 cwd=sandbox_dir,
-                capture_output=True,
-                text=True,
-                timeout=timeout
+                env=self.env,
+                stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE if capture_stderr else asyncio.subprocess.DEVNULL
             )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return -1, "", "Command timed out"
         except Exception as e:
             return -1, "", str(e)
+        
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, "", "Command timed out"
+        
+        return (
+            process.returncode,
+            stdout.decode('utf-8', errors='replace') if stdout else "",
+            stderr.decode('utf-8', errors='replace') if stderr else ""
+        )
     
-    def validate_terraform(self, sandbox_dir: str) -> ValidationResult:
-        """Validate Terraform code"""
+    async def stream_command(self, sandbox_dir: str, command: List[str],
+                             consume: Callable[[asyncio.StreamReader], Awaitable[Any]],
+                             timeout: int = 60, capture_stderr: bool = True) -> Tuple[int, Any, str]:
+        """Run command in sandbox, handing its stdout to consume while it runs
+
+        Large reports are parsed as they arrive instead of being buffered first.
+        Returns the exit code, consume's result (None if the command didn't run
+        or timed out) and stderr, "" when not captured. Errors raised by consume
+        propagate.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=sandbox_dir,
+                env=self.env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE if capture_stderr else asyncio.subprocess.DEVNULL
+            )
+        except Exception as e:
+            return -1, None, str(e)
+        
+        async def collect():
+            if not capture_stderr:
+                result = await consume(process.stdout)
+                await process.wait()
+                return result, b''
+            # stderr is drained alongside so a chatty tool can't block on a full pipe
+            result, stderr = await asyncio.gather(consume(process.stdout), process.stderr.read())
+            await process.wait()
+            return result, stderr
+        
+        try:
+            result, stderr = await asyncio.wait_for(collect(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, None, "Command timed out"
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        
+        return process.returncode, result, stderr.decode('utf-8', errors='replace')
+    
+    @classmethod
+    async def _read_tfsec_report(cls, stream: asyncio.StreamReader) -> Optional[Dict]:
+        """Count tfsec findings by severity and keep the first few, straight from the stream
+
+        Returns None when tfsec printed nothing.
+        """
+        severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        findings = []
+        builder = None
+        severity = None
+        seen = False
+        try:
+            async for prefix, event, value in ijson.parse_async(stream, use_float=True):
+                seen = True
+                if builder is not None:
+                    builder.event(event, value)
+                if prefix == 'results.item':
+                    if event == 'start_map':
+                        severity = 'UNKNOWN'
+                        if len(findings) < cls.FINDINGS_LIMIT:
+                            builder = ijson.ObjectBuilder()
+                            builder.event(event, value)
+                    elif event == 'end_map':
+                        severity_counts[severity] = severity_counts.get(severity, 0) + 1
+                        if builder is not None:
+                            findings.append(builder.value)
+                            builder = None
+                elif prefix == 'results.item.severity' and event == 'string':
+                    severity = value
+        except ijson.IncompleteJSONError:
+            if seen:
+                raise
+            return None
+        return {'severity_counts': severity_counts, 'findings': findings}
+    
+    @classmethod
+    async def _read_checkov_report(cls, stream: asyncio.StreamReader) -> Optional[Dict]:
+        """Sum checkov's pass/fail counts and keep the first failed checks, straight from the stream
+
+        checkov prints one report, or a list of reports when several frameworks
+        match; counts are summed across them. Returns None when it printed nothing.
+        """
+        counts = {'passed': 0, 'failed': 0}
+        findings = []
+        current = None
+        seen = False
+        try:
+            async for prefix, event, value in ijson.parse_async(stream, use_float=True):
+                seen = True
+                if prefix.startswith('item.'):
+                    prefix = prefix[5:]
+                if prefix == 'results.failed_checks.item' and event == 'start_map':
+                    current = None
+                    if len(findings) < cls.FINDINGS_LIMIT:
+                        current = dict.fromkeys(cls.CHECKOV_FINDING_FIELDS.values(), '')
+                        findings.append(current)
+                elif current is not None and prefix in cls.CHECKOV_FINDING_FIELDS and event == 'string':
+                    current[cls.CHECKOV_FINDING_FIELDS[prefix]] = value
+                elif prefix in ('summary.passed', 'summary.failed') and event == 'number':
+                    counts[prefix[8:]] += value
+        except ijson.IncompleteJSONError:
+            if seen:
+                raise
+            return None
+        return {'passed': counts['passed'], 'failed': counts['failed'], 'findings': findings}
+    
+    async def validate_terraform(self, sandbox_dir: str, terraform_code: Optional[str] = None) -> ValidationResult:
+        """Validate Terraform code
+
+        When the code is passed in, its format is checked in process instead of
+        forking `terraform fmt -check`.
+        """
         print("\nValidating Terraform code...")
         errors = []
         warnings = []
         
         # Check format
         print("  Checking format...")
-        fmt_code, _, fmt_err = self.run_command(sandbox_dir, ['terraform', 'fmt', '-check'])
-        format_valid = fmt_code == 0
+        if terraform_code is not None:
+            format_valid = is_terraform_formatted(terraform_code)
+        else:
+            fmt_code, _, _ = await self.run_command(
+                sandbox_dir, [self.terraform_path, 'fmt', '-check'], capture_stdout=False, capture_stderr=False
+            )
+            format_valid = fmt_code == 0
         if not format_valid:
             warnings.append("Code is not properly formatted")
         
         # Initialize
         print("  Running terraform init...")
-        init_code, init_out, init_err = self.run_command(
-            sandbox_dir, ['terraform', 'init', '-no-color']
+        init_code, _, init_err = await self.run_command(
+            sandbox_dir, [self.terraform_path, 'init', '-no-color', '-input=false'], capture_stdout=False
         )
         init_success = init_code == 0
         
@@ -120,33 +476,29 @@ class TerraformSandboxTester:
                 valid=False,
                 format_valid=format_valid,
                 init_success=False,
-                validate_output=init_err,
+                validate_output=self._truncate_output(init_err),
                 errors=errors,
                 warnings=warnings
             )
         
         # Validate
         print("  Running terraform validate...")
-        val_code, val_out, val_err = self.run_command(
-            sandbox_dir, ['terraform', 'validate', '-json']
+        val_code, val_out, val_err = await self.run_command(
+            sandbox_dir, [self.terraform_path, 'validate', '-json']
         )
         
-        validate_output = val_out + val_err
+        validate_output = self._truncate_output(val_out + val_err)
         
         try:
             if val_out:
-                val_result = json.loads(val_out)
+                val_result = self.parse_json(val_out)
                 valid = val_result.get('valid', False)
                 
-                if 'diagnostics' in val_result:
-                    for diag in val_result['diagnostics']:
-                        severity = diag.get('severity', 'error')
-                        msg = f"{diag.get('summary', '')}: {diag.get('detail', '')}"
-                        
-                        if severity == 'error':
-                            errors.append(msg)
-                        else:
-                            warnings.append(msg)
+                # One lookup for the list and a bound get per diagnostic
+                for diag in val_result.get('diagnostics') or ():
+                    get = diag.get
+                    target = errors if get('severity', 'error') == 'error' else warnings
+                    target.append(f"{get('summary', '')}: {get('detail', '')}")
             else:
                 valid = val_code == 0
                 if not valid:
@@ -167,116 +519,121 @@ class TerraformSandboxTester:
             warnings=warnings
         )
     
-    def scan_with_tfsec(self, sandbox_dir: str) -> Optional[SecurityScanResult]:
+    async def scan_with_tfsec(self, sandbox_dir: str) -> Optional[SecurityScanResult]:
         """Scan with tfsec"""
         print("\nRunning tfsec security scan...")
         
-        # Check if tfsec is installed
-        check_code, _, _ = self.run_command(sandbox_dir, ['which', 'tfsec'])
-        if check_code != 0:
+        if not self.tfsec_path:
             print("  WARNING: tfsec not installed, skipping security scan")
             return None
         
-        code, stdout, stderr = self.run_command(
-            sandbox_dir, ['tfsec', '.', '--format', 'json', '--no-color']
-        )
-        
-        if code != 0 and not stdout:
-            print(f"  WARNING: tfsec failed: {stderr}")
-            return None
-        
         try:
-            result = json.loads(stdout) if stdout else {'results': []}
-            findings = result.get('results', [])
-            
-            severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-            for finding in findings:
-                severity = finding.get('severity', 'UNKNOWN')
-                severity_counts[severity] = severity_counts.get(severity, 0) + 1
-            
-            passed = severity_counts['CRITICAL'] == 0 and severity_counts['HIGH'] == 0
-            
-            print(f"  Found {len(findings)} issues")
-            print(f"  Critical: {severity_counts['CRITICAL']}, High: {severity_counts['HIGH']}, " +
-                  f"Medium: {severity_counts['MEDIUM']}, Low: {severity_counts['LOW']}")
-            
-            return SecurityScanResult(
-                passed=passed,
-                critical_issues=severity_counts['CRITICAL'],
-                high_issues=severity_counts['HIGH'],
-                medium_issues=severity_counts['MEDIUM'],
-                low_issues=severity_counts['LOW'],
-                findings=findings[:10],  # Limit to first 10 findings
-                scanner='tfsec'
+            code, report, stderr = await self.stream_command(
+                sandbox_dir, [self.tfsec_path, '.', '--format', 'json', '--no-color'], self._read_tfsec_report
             )
         except Exception as e:
             print(f"  ERROR: Failed to parse tfsec output: {e}")
             return None
+        
+        if code != 0 and report is None:
+            print(f"  WARNING: tfsec failed: {stderr}")
+            return None
+        
+        report = report or {'severity_counts': {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}, 'findings': []}
+        severity_counts = report['severity_counts']
+        passed = severity_counts['CRITICAL'] == 0 and severity_counts['HIGH'] == 0
+        
+        print(f"  Found {sum(severity_counts.values())} issues")
+        print(f"  Critical: {severity_counts['CRITICAL']}, High: {severity_counts['HIGH']}, " +
+              f"Medium: {severity_counts['MEDIUM']}, Low: {severity_counts['LOW']}")
+        
+        return SecurityScanResult(
+            passed=passed,
+            critical_issues=severity_counts['CRITICAL'],
+            high_issues=severity_counts['HIGH'],
+            medium_issues=severity_counts['MEDIUM'],
+            low_issues=severity_counts['LOW'],
+            findings=report['findings'],
+            scanner='tfsec'
+        )
     
-    def scan_with_checkov(self, sandbox_dir: str) -> Optional[SecurityScanResult]:
-        """Scan with checkov"""
+    async def scan_with_checkov(self, sandbox_dir: str, content_hash: Optional[str] = None) -> Optional[SecurityScanResult]:
+        """Scan with checkov
+
+        Pass the hash of the sandbox's main.tf to reuse the result of an
+        earlier scan of the same code.
+        """
         print("\nRunning checkov security scan...")
         
-        # Check if checkov is installed
-        check_code, _, _ = self.run_command(sandbox_dir, ['which', 'checkov'])
-        if check_code != 0:
+        if not self.checkov_path:
             print("  WARNING: checkov not installed, skipping security scan")
             return None
         
-        code, stdout, stderr = self.run_command(
-            sandbox_dir, ['checkov', '-d', '.', '--output', 'json', '--quiet'], timeout=120
-        )
+        if content_hash is not None:
+            cached = self._checkov_cache.get(content_hash)
+            if cached is not None:
+                self._checkov_cache.move_to_end(content_hash)
+                print(f"  Reusing cached result, Failed: {cached.high_issues}")
+                return cached
         
         try:
-            result = json.loads(stdout) if stdout else {}
-            summary = result.get('summary', {})
-            
-            failed = summary.get('failed', 0)
-            passed_checks = summary.get('passed', 0)
-            
-            passed = failed == 0
-            
-            print(f"  Passed: {passed_checks}, Failed: {failed}")
-            
-            # Get detailed findings
-            findings = []
-            for check_result in result.get('results', {}).get('failed_checks', [])[:10]:
-                findings.append({
-                    'check_id': check_result.get('check_id', ''),
-                    'check_name': check_result.get('check_name', ''),
-                    'file_path': check_result.get('file_path', ''),
-                    'resource': check_result.get('resource', '')
-                })
-            
-            return SecurityScanResult(
-                passed=passed,
-                critical_issues=0,
-                high_issues=failed,
-                medium_issues=0,
-                low_issues=0,
-                findings=findings,
-                scanner='checkov'
+            code, report, _ = await self.stream_command(
+                sandbox_dir, [self.checkov_path, '-d', '.', '--output', 'json', '--quiet'],
+                self._read_checkov_report, timeout=120, capture_stderr=False
             )
         except Exception as e:
             print(f"  WARNING: checkov parsing failed: {e}")
             return None
+        
+        report = report or {'passed': 0, 'failed': 0, 'findings': []}
+        failed = report['failed']
+        passed = failed == 0
+        
+        print(f"  Passed: {report['passed']}, Failed: {failed}")
+        
+        result = SecurityScanResult(
+            passed=passed,
+            critical_issues=0,
+            high_issues=failed,
+            medium_issues=0,
+            low_issues=0,
+            findings=report['findings'],
+            scanner='checkov'
+        )
+        # Only a report checkov actually produced is worth reusing
+        if content_hash is not None and code != -1:
+            self._checkov_cache[content_hash] = result
+            while len(self._checkov_cache) > self.CHECKOV_CACHE_SIZE:
+                self._checkov_cache.popitem(last=False)
+        return result
     
-    def generate_plan(self, sandbox_dir: str) -> Optional[str]:
+    async def generate_plan(self, sandbox_dir: str) -> Optional[str]:
         """Generate Terraform plan"""
         print("\nGenerating Terraform plan...")
         
-        plan_code, plan_out, plan_err = self.run_command(
-            sandbox_dir, ['terraform', 'plan', '-no-color']
+        plan_code, plan_out, plan_err = await self.run_command(
+            # No state lock: the sandbox is private, and the lock file would land in the scanned directory
+            sandbox_dir, [self.terraform_path, 'plan', '-no-color', '-lock=false']
         )
         
         if plan_code == 0:
             print("  Plan generated successfully")
-            return plan_out
+            return self._truncate_output(plan_out)
         else:
+            plan_err = self._truncate_output(plan_err)
             print(f"  Plan generation failed: {plan_err}")
             return plan_err
     
-    def test_terraform_code(self, terraform_code: str, 
+    @classmethod
+    def _truncate_output(cls, output: str) -> str:
+        """Keep the head and tail of long command output, where the summary and errors are"""
+        if len(output) <= cls.MAX_OUTPUT_CHARS:
+            return output
+        half = cls.MAX_OUTPUT_CHARS // 2
+        return (f"{output[:half]}\n... [truncated {len(output) - cls.MAX_OUTPUT_CHARS} characters] ...\n"
+                f"{output[-half:]}")
+    
+    async def test_terraform_code(self, terraform_code: str, 
                            run_security_scan: bool = True,
                            generate_plan: bool = True) -> TestResult:
         """Test Terraform code with all checks"""
@@ -291,23 +648,24 @@ class TerraformSandboxTester:
             self.write_terraform_file(sandbox_dir, terraform_code)
             
             # Validation
-            validation = self.validate_terraform(sandbox_dir)
+            validation = await self.validate_terraform(sandbox_dir, terraform_code)
             
-            # Security scanning
+            # Security scanning and plan generation only read the initialized
+            # sandbox, so they run side by side instead of one after another
             security_scans = []
-            if run_security_scan and validation.valid:
-                tfsec_result = self.scan_with_tfsec(sandbox_dir)
-                if tfsec_result:
-                    security_scans.append(tfsec_result)
-                
-                checkov_result = self.scan_with_checkov(sandbox_dir)
-                if checkov_result:
-                    security_scans.append(checkov_result)
-            
-            # Generate plan
             plan_output = None
-            if generate_plan and validation.valid:
-                plan_output = self.generate_plan(sandbox_dir)
+            if validation.valid:
+                if run_security_scan:
+                    content_hash = hashlib.sha256(terraform_code.encode('utf-8')).hexdigest()
+                    scans = [self.scan_with_tfsec(sandbox_dir), self.scan_with_checkov(sandbox_dir, content_hash)]
+                else:
+                    scans = []
+                plan = [self.generate_plan(sandbox_dir)] if generate_plan else []
+                results = await asyncio.gather(*scans, *plan)
+                
+                security_scans = [scan for scan in results[:len(scans)] if scan]
+                if plan:
+                    plan_output = results[-1]
             
             # Determine overall result
             overall_passed = validation.valid
@@ -373,13 +731,22 @@ class TerraformSandboxTester:
         
         return '\n'.join(summary)
     
+    @staticmethod
+    def _fields(obj) -> Dict:
+        """Top-level fields of a result dataclass
+
+        Unlike asdict there's no recursive deep copy; lists such as errors and
+        findings are shared with the result rather than rebuilt.
+        """
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    
     def to_dict(self, result: TestResult) -> Dict:
         """Convert result to dictionary"""
         return {
             'status': result.status,
             'timestamp': result.timestamp,
-            'validation': asdict(result.validation) if result.validation else None,
-            'security_scans': [asdict(scan) for scan in result.security_scans],
+            'validation': self._fields(result.validation) if result.validation else None,
+            'security_scans': [self._fields(scan) for scan in result.security_scans],
             'plan_output': result.plan_output,
             'overall_passed': result.overall_passed,
             'summary': result.summary
@@ -425,11 +792,19 @@ resource "aws_s3_bucket_versioning" "example" {
 }
 """
     
-    result = tester.test_terraform_code(
+    # Same loop the API runs on: scan, plan and their pipes are all driven from one
+    # epoll-backed loop, with no thread per subprocess
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+    
+    result = run(tester.test_terraform_code(
         terraform_code=terraform_code,
         run_security_scan=True,
         generate_plan=True
-    )
+    ))
     
     print("\n" + result.summary)
     print(f"\nTest result: {result.status}")
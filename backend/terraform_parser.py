@@ -0,0 +1,88 @@
+"""
+Terraform file parsing for GitHub extraction
+Kept free of the app's heavy imports so parse-pool workers start quickly
+"""
+
+import re
+
+# Prefer RE2's compiled linear-time matcher for HCL scanning when google-re2 is installed
+try:
+    import re2 as regex_engine
+except ImportError:
+    regex_engine = re
+
+
+# Terraform block patterns, compiled once at import. No pattern uses '.',
+# so none needs DOTALL and all of them compile under either engine.
+TERRAFORM_BLOCK_RE = regex_engine.compile(
+    r'(?P<resource>resource\s+"(?P<resource_type>[^"]+)"\s+"(?P<resource_name>[^"]+)")'
+    r'|(?P<module>module\s+"[^"]+"\s*\{[^}]*source\s*=\s*"(?P<module_source>[^"]+)")'
+    r'|(?P<provider>provider\s+"(?P<provider_name>[^"]+)")'
+    r'|(?P<variable>variable\s+"(?P<variable_name>[^"]+)")'
+    r'|(?P<output>output\s+"(?P<output_name>[^"]+)")'
+)
+TERRAFORM_CONFIG_RE = regex_engine.compile(r'\s*terraform \{')
+
+# Checked in order against the lowercased path; the first matching keyword wins
+_CLASSIFY_RULES = (
+    ('variables', ('variables',)),
+    ('outputs', ('outputs',)),
+    ('providers', ('providers', 'terraform')),
+    ('module', ('modules',)),
+    ('main', ('main',)),
+)
+
+
+def classify_file_type(filepath: str, content: str) -> str:
+    """Classify a Terraform file by its path, falling back to its first block"""
+    filename = filepath.lower()
+    if filename.startswith('vars'):
+        return 'variables'
+    for file_type, keywords in _CLASSIFY_RULES:
+        if any(keyword in filename for keyword in keywords):
+            return file_type
+    # Anchored match skips leading whitespace without copying the content
+    if TERRAFORM_CONFIG_RE.match(content):
+        return 'terraform_config'
+    return 'resource'
+
+
+def parse_terraform_content(content: str) -> dict:
+    """Extract resources, modules, providers, variables and outputs from HCL text in one pass"""
+    # Dicts dedupe repeated declarations while keeping source order
+    resources, modules, variables, outputs = {}, {}, {}, {}
+    providers = set()
+    
+    for match in TERRAFORM_BLOCK_RE.finditer(content):
+        kind = match.lastgroup
+        if kind == 'resource':
+            resources[f"{match.group('resource_type')}.{match.group('resource_name')}"] = None
+        elif kind == 'module':
+            modules[match.group('module_source')] = None
+        elif kind == 'provider':
+            providers.add(match.group('provider_name'))
+        elif kind == 'variable':
+            variables[match.group('variable_name')] = None
+        elif kind == 'output':
+            outputs[match.group('output_name')] = None
+    
+    return {
+        'resources': list(resources),
+        'modules': list(modules),
+        'providers': sorted(providers),
+        'variables': list(variables),
+        'outputs': list(outputs)
+    }
+
+
+def parse_file(content: str, filepath: str) -> tuple:
+    """Process-pool entry point: classify and parse one file into a picklable tuple"""
+    parsed = parse_terraform_content(content)
+    return (
+        classify_file_type(filepath, content),
+        parsed['resources'],
+        parsed['modules'],
+        parsed['providers'],
+        parsed['variables'],
+        parsed['outputs']
+    )